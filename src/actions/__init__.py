@@ -1,18 +1,30 @@
 
 from .actions import (
+	ActionAnswerQuestion,
 	ActionGenerateRecipeFromIngredients,
 	ActionGenerateRecipeFromName,
+	ActionPatchRecipe,
 	ActionTellRecipeStep,
+	ActionUpdateInventory,
+	ActionFinalizeInventory,
 	ActionHelloWorld,
+	ActionSlowDown,
+	ActionStopAudio,
 	ActionTextToSpeech,
 	ActionUiRefreshPronouncePhrase,
 )
 
 __all__ = [
 	"ActionHelloWorld",
+	"ActionAnswerQuestion",
 	"ActionGenerateRecipeFromIngredients",
 	"ActionGenerateRecipeFromName",
+	"ActionPatchRecipe",
 	"ActionTellRecipeStep",
+	"ActionUpdateInventory",
+	"ActionFinalizeInventory",
+	"ActionSlowDown",
+	"ActionStopAudio",
 	"ActionTextToSpeech",
 	"ActionUiRefreshPronouncePhrase",
 ]
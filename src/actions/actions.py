@@ -6,27 +6,48 @@ The implementation is split into smaller modules under `src/actions/`.
 
 # Actions (résumé rapide)
 # - action_hello_world: pas d'entrée, utter "Hello World!".
-# - action_generate_recipe_from_ingredients: slots {liste_ingredients, contraintes, temps_max, nb_personnes}; env {OPENAI_API_KEY, OPENAI_MODEL}; sort json_message conforme RECIPE_SCHEMA.
-# - action_generate_recipe_from_name: slots {nom_recette, nb_personnes, temps_max, contraintes, difficulte}; env {OPENAI_API_KEY, OPENAI_MODEL}; sort json_message conforme RECIPE_SCHEMA.
+# - action_generate_recipe_from_ingredients: slots {liste_ingredients|inventory, contraintes, temps_max, nb_personnes}; env {OPENAI_API_KEY, OPENAI_MODEL}; sort json_message conforme RECIPE_SCHEMA (cache RecipeStore) + SlotSet(recipe_card, recipe_steps, recipe_spec, recipe_version, step_index).
+# - action_generate_recipe_from_name: slots {nom_recette, nb_personnes, temps_max, contraintes, difficulte}; env {OPENAI_API_KEY, OPENAI_MODEL}; sort json_message conforme RECIPE_SCHEMA (cache RecipeStore) + SlotSet(recipe_card, recipe_steps, recipe_spec, recipe_version, step_index).
+# - action_patch_recipe: slots {recipe_card, recipe_spec, recipe_version, step_index} + {nb_personnes, temps_max, contraintes, difficulte} + latest_message.text; diff RECIPE_PATCH_SCHEMA appliqué localement, étapes renumérotées, step_index recalé.
+# - action_update_inventory: lit latest_message (entités ingredient, sinon texte) + slot inventory; sort SlotSet(inventory, ingredients); relance la recherche de candidates en arrière-plan (INVENTORY_*).
+# - action_finalize_inventory: slot inventory; sort SlotSet("candidate_recipes") (résultat déjà calculé si possible).
+# - action_answer_question: lit latest_message.text + recette en cours {recipe_steps|recipe_card|..., step_index}; utter réponse (recette, glossaire BM25 local, puis LLM si confiance < QA_MIN_CONFIDENCE, réponse apprise).
 # - action_tell_recipe_step: lit slots {recipe_steps|recipe_json|last_recipe} + {step_index, last_step_text}; sort SlotSet(step_index, last_step_text) + utter étape.
-# - action_text_to_speech: slots {tts_text|texte_a_dire|texte} (fallback latest_message.text); env {OPENAI_API_KEY, OPENAI_TTS_*, TTS_*}; sort SlotSet("tts_last_file"), lecture locale si TTS_PLAY_AUDIO=true.
+# - action_text_to_speech: slots {tts_text|texte_a_dire|texte} (fallback latest_message.text); env {OPENAI_API_KEY, OPENAI_TTS_*, TTS_*}; sort SlotSet("tts_last_file"), vitesse selon speech_rate, lecture locale si TTS_PLAY_AUDIO=true (moteur unique, remplace l'audio en cours sauf TTS_PREEMPT=false; TTS_PLAY_AUDIO_SYNC=true attend la fin).
+# - action_slow_down: slots {speech_rate, tts_last_file}; env {TTS_SLOW_DOWN_STEP, TTS_PLAY_AUDIO, TTS_EMIT_MESSAGE}; sort SlotSet("speech_rate") + utter_slow_confirm, rejoue la dernière phrase ralentie (WSOLA local, cache par hash audio + vitesse), en local et/ou via json_message {tts: {url}}.
+# - action_stop_audio: pas d'entrée; coupe la lecture locale (flow pause_recipe, data/recipe_controls.yml).
 # - action_ui_refresh_pronounce_phrase: pas d'entrée; sort SlotSet("ui_event"={type:"PRONOUNCE_PHRASE", text:"Je pronnonce cette phrase"}).
 
 from __future__ import annotations
 
 from .misc_actions import ActionHelloWorld
+from .qa_actions import ActionAnswerQuestion
 from .recipe_actions import (
     ActionGenerateRecipeFromIngredients,
+    ActionFinalizeInventory,
     ActionGenerateRecipeFromName,
+    ActionPatchRecipe,
     ActionTellRecipeStep,
+    ActionUpdateInventory,
+)
+from .tts_actions import (
+    ActionSlowDown,
+    ActionStopAudio,
+    ActionTextToSpeech,
+    ActionUiRefreshPronouncePhrase,
 )
-from .tts_actions import ActionTextToSpeech, ActionUiRefreshPronouncePhrase
 
 __all__ = [
     "ActionHelloWorld",
+    "ActionAnswerQuestion",
     "ActionGenerateRecipeFromIngredients",
     "ActionGenerateRecipeFromName",
+    "ActionPatchRecipe",
     "ActionTellRecipeStep",
+    "ActionUpdateInventory",
+    "ActionFinalizeInventory",
+    "ActionSlowDown",
+    "ActionStopAudio",
     "ActionTextToSpeech",
     "ActionUiRefreshPronouncePhrase",
 ]
\ No newline at end of file
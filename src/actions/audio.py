@@ -1,8 +1,27 @@
 from __future__ import annotations
 
+import itertools
 import os
 import platform
+import queue
+import shutil
+import subprocess
+import tempfile
 import threading
+import time
+import wave
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+
+# Priorités de lecture (plus petit = plus prioritaire): une réécoute demandée par
+# l'utilisateur (slow_down) passe devant les étapes encore en file.
+PRIORITY_URGENT = 0
+PRIORITY_STEP = 10
+
+# Intervalle de scrutation pendant la lecture: borne la latence d'interruption.
+_POLL_INTERVAL_S = 0.02
 
 
 def truthy_env(name: str, default: bool = False) -> bool:
@@ -12,25 +31,325 @@ def truthy_env(name: str, default: bool = False) -> bool:
     return value.strip().lower() in {"1", "true", "yes", "y", "on"}
 
 
-def play_audio_local_async(file_path: str) -> None:
-    thread = threading.Thread(target=play_audio_local, args=(file_path,), daemon=True)
-    thread.start()
+def float_env(name: str, default: float) -> float:
+    """Nombre lu dans l'environnement; valeur absente ou invalide -> `default`."""
+
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    try:
+        return float(value.strip().replace(",", "."))
+    except ValueError:
+        return default
+
 
+def tts_public_url(file_path: str) -> str:
+    """URL publique d'un fichier TTS servi par le serveur d'actions (route /tts/<nom>).
 
-def play_audio_local(file_path: str) -> None:
-    system = platform.system().lower()
+    Optionnel: TTS_PUBLIC_BASE_URL (défaut: http://localhost:5055/tts)
+    """
 
-    if system == "windows":
-        try:
-            import winsound
-        except Exception:
+    base_url = os.getenv("TTS_PUBLIC_BASE_URL", "http://localhost:5055/tts")
+    return f"{base_url.rstrip('/')}/{Path(file_path).name}"
+
+
+def wav_duration_s(file_path: str) -> Optional[float]:
+    """Durée d'un fichier WAV en secondes (None si illisible ou autre format)."""
+
+    try:
+        with wave.open(file_path, "rb") as wav:
+            rate = wav.getframerate()
+            return wav.getnframes() / float(rate) if rate else None
+    except Exception:
+        return None
+
+
+def _concat_wav_chunks(file_paths: Sequence[str]) -> Optional[str]:
+    """Concatène des chunks WAV de même format dans un fichier temporaire.
+
+    Retourne None si les chunks ne sont pas des WAV compatibles (la lecture se fait
+    alors chunk par chunk).
+    """
+
+    params = None
+    frames: List[bytes] = []
+    try:
+        for path in file_paths:
+            with wave.open(path, "rb") as wav:
+                current = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+                if params is None:
+                    params = current
+                elif current != params:
+                    return None
+                frames.append(wav.readframes(wav.getnframes()))
+    except Exception:
+        return None
+
+    if params is None:
+        return None
+
+    fd, out_path = tempfile.mkstemp(prefix="tts_chunks_", suffix=".wav")
+    os.close(fd)
+    with wave.open(out_path, "wb") as out:
+        out.setnchannels(params[0])
+        out.setsampwidth(params[1])
+        out.setframerate(params[2])
+        for chunk in frames:
+            out.writeframes(chunk)
+    return out_path
+
+
+class AudioSink(ABC):
+    """Sortie audio utilisée par le moteur de lecture.
+
+    `play` bloque jusqu'à la fin de la lecture ou jusqu'à ce que `stop_event` soit levé.
+    """
+
+    @abstractmethod
+    def play(self, file_path: str, stop_event: threading.Event) -> None:
+        ...
+
+
+class NullSink(AudioSink):
+    """Sink sans sortie son (tests, serveurs sans carte son).
+
+    - garde la liste des fichiers "joués" dans `played`
+    - si `realtime=True`, attend la durée du WAV (interruptible)
+    """
+
+    def __init__(self, realtime: bool = False) -> None:
+        self.realtime = realtime
+        self.played: List[str] = []
+
+    def play(self, file_path: str, stop_event: threading.Event) -> None:
+        self.played.append(file_path)
+        if self.realtime:
+            stop_event.wait(wav_duration_s(file_path) or 0.0)
+
+
+class WinsoundSink(AudioSink):
+    """Lecture via `winsound` (Windows), interrompue par SND_PURGE."""
+
+    def play(self, file_path: str, stop_event: threading.Event) -> None:
+        import winsound
+
+        duration = wav_duration_s(file_path)
+        if duration is None:
+            # winsound ne lit que du WAV: lecture synchrone non interruptible.
+            winsound.PlaySound(file_path, winsound.SND_FILENAME)
             return
 
-        flags = winsound.SND_FILENAME
-        if not truthy_env("TTS_PLAY_AUDIO_SYNC", default=False):
-            flags |= winsound.SND_ASYNC
+        winsound.PlaySound(file_path, winsound.SND_FILENAME | winsound.SND_ASYNC)
+        if stop_event.wait(duration):
+            winsound.PlaySound(None, winsound.SND_PURGE)
 
-        try:
-            winsound.PlaySound(file_path, flags)
-        except Exception:
+
+class CommandSink(AudioSink):
+    """Lecture via un lecteur en ligne de commande (afplay, paplay, aplay, ffplay)."""
+
+    _CANDIDATES = (
+        ("afplay",),
+        ("paplay",),
+        ("aplay", "-q"),
+        ("ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"),
+    )
+
+    def __init__(self, command: Optional[Sequence[str]] = None) -> None:
+        self.command = list(command) if command else self._find_player()
+
+    @classmethod
+    def _find_player(cls) -> List[str]:
+        for candidate in cls._CANDIDATES:
+            if shutil.which(candidate[0]):
+                return list(candidate)
+        return []
+
+    def play(self, file_path: str, stop_event: threading.Event) -> None:
+        if not self.command:
             return
+
+        proc = subprocess.Popen(
+            [*self.command, file_path],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            while proc.poll() is None:
+                if stop_event.wait(_POLL_INTERVAL_S):
+                    proc.terminate()
+                    break
+        finally:
+            try:
+                proc.wait(timeout=1.0)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def default_sink() -> AudioSink:
+    """Choisit le sink selon TTS_AUDIO_SINK (auto|null|winsound|command)."""
+
+    kind = (os.getenv("TTS_AUDIO_SINK") or "auto").strip().lower()
+    if kind == "null":
+        return NullSink()
+    if kind == "winsound" or (kind == "auto" and platform.system().lower() == "windows"):
+        return WinsoundSink()
+    return CommandSink()
+
+
+class PlaybackEngine:
+    """Moteur de lecture: un seul worker, une file à priorité, interruption (barge-in).
+
+    - `enqueue(...)`: ajoute un énoncé (un fichier ou plusieurs chunks joués sans trou);
+      retourne un Event levé quand il a été joué, interrompu ou abandonné
+    - `enqueue(..., preempt=True)` / `interrupt()`: coupe la lecture en cours et vide la file
+    - `stats()`: profondeur de file et retard de lecture (enqueue -> début de lecture)
+    """
+
+    def __init__(self, sink: Optional[AudioSink] = None) -> None:
+        self.sink = sink or default_sink()
+        self._queue: "queue.PriorityQueue[Any]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stop_event = threading.Event()
+        self._current: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._played = 0
+        self._dropped = 0
+        self._last_lag_s: Optional[float] = None
+        self._max_lag_s = 0.0
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="tts-playback", daemon=True)
+            self._thread.start()
+
+    def enqueue(
+        self,
+        file_paths: Sequence[str] | str,
+        priority: int = PRIORITY_STEP,
+        preempt: bool = False,
+    ) -> threading.Event:
+        done = threading.Event()
+        paths = [p for p in ([file_paths] if isinstance(file_paths, str) else file_paths) if p]
+        if not paths:
+            done.set()
+            return done
+
+        if preempt:
+            self.interrupt()
+
+        with self._lock:
+            generation = self._generation
+        item = {"paths": paths, "generation": generation, "enqueued_at": time.monotonic(), "done": done}
+        self._queue.put((priority, next(self._seq), item))
+        self._ensure_worker()
+        return done
+
+    def interrupt(self) -> None:
+        """Coupe la lecture en cours et invalide tout ce qui est en file."""
+
+        with self._lock:
+            self._generation += 1
+            self._stop_event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            current = self._current
+            return {
+                "queue_depth": self._queue.qsize(),
+                "playing": current is not None,
+                "played": self._played,
+                "dropped": self._dropped,
+                "last_lag_s": self._last_lag_s,
+                "max_lag_s": self._max_lag_s,
+            }
+
+    def _run(self) -> None:
+        while True:
+            _, _, item = self._queue.get()
+            try:
+                self._play_item(item)
+            except Exception:
+                # Une erreur de sortie audio ne doit jamais tuer le worker.
+                pass
+            finally:
+                with self._lock:
+                    self._current = None
+                item["done"].set()
+                self._queue.task_done()
+
+    def _play_item(self, item: Dict[str, Any]) -> None:
+        with self._lock:
+            if item["generation"] != self._generation:
+                self._dropped += 1
+                return
+            # Nouvel énoncé courant: on réarme l'événement d'arrêt.
+            self._stop_event.clear()
+            self._current = item
+            stop_event = self._stop_event
+            lag = time.monotonic() - item["enqueued_at"]
+            self._last_lag_s = lag
+            self._max_lag_s = max(self._max_lag_s, lag)
+
+        paths = item["paths"]
+        merged = _concat_wav_chunks(paths) if len(paths) > 1 else None
+        try:
+            for path in [merged] if merged else paths:
+                if stop_event.is_set():
+                    break
+                self.sink.play(path, stop_event)
+        finally:
+            if merged:
+                try:
+                    os.remove(merged)
+                except OSError:
+                    pass
+
+        with self._lock:
+            self._played += 1
+
+
+_ENGINE: Optional[PlaybackEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_playback_engine() -> PlaybackEngine:
+    """Moteur de lecture partagé par le process (créé à la première utilisation)."""
+
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = PlaybackEngine()
+        return _ENGINE
+
+
+def stop_audio_playback() -> None:
+    """Interrompt la lecture locale (pause, nouvelle étape...)."""
+
+    with _ENGINE_LOCK:
+        engine = _ENGINE
+    if engine is not None:
+        engine.interrupt()
+
+
+def play_audio_local_async(file_path: str, priority: int = PRIORITY_STEP, preempt: bool = True) -> None:
+    """Joue un fichier via le moteur partagé; par défaut il remplace la lecture en cours.
+
+    Optionnel: TTS_PLAY_AUDIO_SYNC=true attend la fin de la lecture (ou son interruption).
+    """
+
+    done = get_playback_engine().enqueue(file_path, priority=priority, preempt=preempt)
+    if truthy_env("TTS_PLAY_AUDIO_SYNC", default=False):
+        done.wait()
+
+
+def play_audio_local(file_path: str) -> None:
+    """Lecture synchrone (bloquante) avec le sink par défaut de la plateforme."""
+
+    try:
+        default_sink().play(file_path, threading.Event())
+    except Exception:
+        return
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import uuid
+import wave
+from pathlib import Path
+from typing import Any, Optional, Tuple
+
+
+MIN_RATE = 0.5
+MAX_RATE = 2.0
+
+# Paramètres WSOLA (en secondes): fenêtre, tolérance de recherche.
+_FRAME_S = 0.04
+_TOLERANCE_S = 0.01
+
+
+def _np() -> Any:
+    try:
+        import numpy as np
+    except ModuleNotFoundError as exc:
+        raise RuntimeError(
+            "La librairie 'numpy' n'est pas installée. Installe-la puis relance l'action server."
+        ) from exc
+    return np
+
+
+def read_wav(file_path: str) -> Tuple[Any, int, int]:
+    """Lit un WAV PCM -> (échantillons float32 de forme (n, canaux), fréquence, largeur d'échantillon)."""
+
+    np = _np()
+    with wave.open(file_path, "rb") as wav:
+        channels = wav.getnchannels()
+        sampwidth = wav.getsampwidth()
+        rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+
+    if sampwidth == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sampwidth == 2:
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+    elif sampwidth == 4:
+        samples = np.frombuffer(raw, dtype="<i4").astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Largeur d'échantillon WAV non gérée: {sampwidth} octets")
+
+    return samples.reshape(-1, channels), rate, sampwidth
+
+
+def write_wav(file_path: str, samples: Any, rate: int, sampwidth: int = 2) -> None:
+    np = _np()
+    clipped = np.clip(samples, -1.0, 1.0)
+    if sampwidth == 1:
+        raw = (clipped * 127.0 + 128.0).astype(np.uint8).tobytes()
+    elif sampwidth == 4:
+        raw = (clipped * 2147483647.0).astype("<i4").tobytes()
+    else:
+        sampwidth = 2
+        raw = (clipped * 32767.0).astype("<i2").tobytes()
+
+    with wave.open(file_path, "wb") as wav:
+        wav.setnchannels(clipped.shape[1] if clipped.ndim == 2 else 1)
+        wav.setsampwidth(sampwidth)
+        wav.setframerate(rate)
+        wav.writeframes(raw)
+
+
+def wsola_stretch(samples: Any, sample_rate: int, rate: float) -> Any:
+    """Time-stretch WSOLA (hauteur conservée).
+
+    `rate` est la vitesse de lecture: 0.8 = 25% plus long (plus lent), 1.25 = plus rapide.
+    `samples` est de forme (n, canaux). La recherche du meilleur recouvrement est
+    vectorisée (une corrélation NumPy par trame sur la zone de tolérance).
+    """
+
+    np = _np()
+    x = np.asarray(samples, dtype=np.float32)
+    if x.ndim == 1:
+        x = x[:, None]
+    n_samples = x.shape[0]
+
+    frame = max(64, int(sample_rate * _FRAME_S) // 2 * 2)
+    hop_out = frame // 2
+    hop_in = hop_out * rate
+    tolerance = max(1, int(sample_rate * _TOLERANCE_S))
+
+    if n_samples < frame * 2 or abs(rate - 1.0) < 1e-3:
+        return x.copy()
+
+    # Marges: les positions de recherche ne sortent jamais du signal.
+    pad = tolerance + frame
+    padded = np.pad(x, ((pad, pad), (0, 0)))
+    mono = padded.mean(axis=1)
+
+    n_frames = int((n_samples - frame) / hop_in) + 1
+    out_len = (n_frames - 1) * hop_out + frame
+    out = np.zeros((out_len, x.shape[1]), dtype=np.float32)
+    norm = np.zeros(out_len, dtype=np.float32)
+    window = np.hanning(frame).astype(np.float32)
+
+    prev = pad  # position (dans `padded`) de la trame précédente retenue
+    for k in range(n_frames):
+        nominal = pad + int(round(k * hop_in))
+        if k == 0:
+            pos = nominal
+        else:
+            # Continuation naturelle de la trame précédente: on cherche la trame
+            # candidate autour de la position nominale qui lui ressemble le plus.
+            template = mono[prev + hop_out:prev + hop_out + frame]
+            lo = nominal - tolerance
+            region = mono[lo:nominal + tolerance + frame]
+            pos = lo + int(np.argmax(np.correlate(region, template, mode="valid")))
+
+        start = k * hop_out
+        out[start:start + frame] += padded[pos:pos + frame] * window[:, None]
+        norm[start:start + frame] += window
+        prev = pos
+
+    norm[norm < 1e-6] = 1.0
+    return out / norm[:, None]
+
+
+def clamp_rate(rate: float) -> float:
+    return round(min(MAX_RATE, max(MIN_RATE, float(rate))), 2)
+
+
+def stretched_file_path(file_path: str, rate: float) -> Path:
+    """Chemin du cache pour (hash du contenu audio, vitesse), à côté des fichiers TTS."""
+
+    digest = hashlib.sha256(Path(file_path).read_bytes()).hexdigest()[:24]
+    return Path(file_path).with_name(f"tts_{digest}_r{clamp_rate(rate):.2f}.wav")
+
+
+def time_stretch_file(file_path: str, rate: float) -> str:
+    """Version ralentie/accélérée d'un WAV, mise en cache par (hash audio, vitesse).
+
+    Retourne le fichier d'origine si la vitesse est ~1 ou si ce n'est pas un WAV PCM.
+    """
+
+    rate = clamp_rate(rate)
+    if abs(rate - 1.0) < 1e-3 or Path(file_path).suffix.lower() != ".wav":
+        return file_path
+
+    out_path = stretched_file_path(file_path, rate)
+    if out_path.is_file() and out_path.stat().st_size > 0:
+        return str(out_path)
+
+    try:
+        samples, sample_rate, sampwidth = read_wav(file_path)
+    except (wave.Error, ValueError, EOFError):
+        return file_path
+
+    stretched = wsola_stretch(samples, sample_rate, rate)
+
+    tmp_path = out_path.with_name(f".{out_path.name}.{uuid.uuid4().hex}.tmp")
+    write_wav(str(tmp_path), stretched, sample_rate, sampwidth)
+    os.replace(tmp_path, out_path)
+    return str(out_path)
+
+
+def speech_rate_from_slot(value: Optional[Any]) -> float:
+    """Vitesse de parole stockée dans le slot `speech_rate` (1.0 par défaut)."""
+
+    try:
+        return clamp_rate(float(value))
+    except (TypeError, ValueError):
+        return 1.0
@@ -0,0 +1,424 @@
+"""Inventaire frigo incrémental (slot `inventory`) et recherche anticipée de recettes candidates.
+
+L'inventaire est un dict {ingrédient normalisé: {"label": nom tel que dit par
+l'utilisateur, "amounts": {unité: quantité}}} ("" = pièces, dict vide = quantité
+inconnue). La clé normalisée sert au dédoublonnage et aux clés de cache; le
+prompt reçoit les noms affichés avec leurs quantités. Chaque énoncé
+`add_ingredient` le met à jour (dédoublonnage, cumul des quantités) et relance,
+après un court délai sans nouvel ingrédient, la recherche des candidates dans le
+cache de fiches (RecipeStore). Quand l'utilisateur a fini, le résultat est déjà prêt.
+
+Optionnel:
+  - INVENTORY_DEBOUNCE_S (défaut: 0.5): délai avant la recherche en arrière-plan
+  - INVENTORY_CANDIDATES (défaut: 3): nombre de candidates retenues
+  - INVENTORY_PREWARM (défaut: false): si aucune candidate ne couvre l'inventaire,
+    génère en avance la fiche "depuis les ingrédients" (appel OpenAI)
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .audio import float_env, truthy_env
+from .recipe_store import RecipeStore, get_recipe_store, recipe_key
+
+
+Inventory = Dict[str, Dict[str, Any]]
+# (clé normalisée, unité, quantité, nom affiché)
+ParsedIngredient = Tuple[str, Optional[str], Optional[float], str]
+
+_ARTICLES = {
+    "a", "an", "the", "some", "of", "my",
+    "le", "la", "les", "l", "un", "une", "des", "du", "de", "d", "mes",
+}
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "un": 1, "une": 1, "deux": 2, "trois": 3, "quatre": 4, "cinq": 5,
+}
+# Pluriels invariants (et mots en -s/-x au singulier), jamais tronqués; les mots en -us
+# (jus, couscous, asparagus, hummus...) non plus.
+_INVARIANT_PLURALS = {
+    "ananas", "anchois", "anis", "brebis", "calvados", "cassis", "frais", "gras", "mais",
+    "maïs", "molasses", "noix", "panais", "paris", "perdrix", "pois", "radis", "salsifis",
+}
+_LEADING_ARTICLES = re.compile(
+    r"^(?:(?:a|an|the|some|of|my|le|la|les|un|une|des|du|de|mes)\s+|[ld]['’]\s*)+",
+    re.IGNORECASE,
+)
+# Unité -> (unité canonique, facteur).
+_UNITS = {
+    "g": ("g", 1.0), "gr": ("g", 1.0), "gram": ("g", 1.0), "grams": ("g", 1.0),
+    "gramme": ("g", 1.0), "grammes": ("g", 1.0),
+    "kg": ("g", 1000.0), "kilo": ("g", 1000.0), "kilos": ("g", 1000.0),
+    "ml": ("ml", 1.0), "cl": ("ml", 10.0), "dl": ("ml", 100.0),
+    "l": ("ml", 1000.0), "litre": ("ml", 1000.0), "litres": ("ml", 1000.0),
+    "liter": ("ml", 1000.0), "liters": ("ml", 1000.0),
+}
+_LEAD_IN = re.compile(
+    r"^(?:(?:in my (?:fridge|pantry),?\s*)?i (?:also |still )?(?:have|got)|there is|there are|"
+    r"add|also|and|j'ai (?:aussi |encore )?|il y a|ajoute|aussi|et)\b\s*",
+    re.IGNORECASE,
+)
+_SPLIT = re.compile(r"\s*(?:,|;|&|\+|\band\b|\bet\b|\bplus\b)\s*", re.IGNORECASE)
+_QUANTITY = re.compile(r"^(\d+(?:[.,]\d+)?)\s*([a-zA-Z]+)?\b\s*(.*)$")
+
+
+def normalize_ingredient(name: Any) -> Optional[str]:
+    """Nom canonique: minuscules, sans article ni pluriel simple ("les tomates" -> "tomate")."""
+
+    text = str(name or "").lower().replace("œ", "oe").replace("’", "'")
+    words = [w for w in re.split(r"[^\w-]+", text) if w]
+    while words and words[0] in _ARTICLES:
+        words.pop(0)
+    if not words:
+        return None
+
+    last = words[-1]
+    if last in _INVARIANT_PLURALS or last.endswith("us"):
+        pass
+    elif last.endswith("oes") and len(last) > 4:
+        last = last[:-2]
+    elif last.endswith("ies") and len(last) > 4:
+        last = last[:-3] + "y"
+    elif last.endswith(("s", "x")) and not last.endswith("ss") and len(last) > 3:
+        last = last[:-1]
+    words[-1] = last
+    return " ".join(words)
+
+
+def display_name(name: Any) -> str:
+    """Nom tel que dit par l'utilisateur, sans article ("les noix" -> "noix")."""
+
+    text = " ".join(str(name or "").replace("’", "'").split())
+    return _LEADING_ARTICLES.sub("", text).strip()
+
+
+def parse_ingredient(chunk: str) -> Optional[ParsedIngredient]:
+    """ "200 g de farine" -> ("farine", "g", 200.0, "farine"); "eggs" -> ("egg", None, None, "eggs")."""
+
+    text = chunk.strip().lower()
+    unit: Optional[str] = None
+    quantity: Optional[float] = None
+
+    first, _, rest = text.partition(" ")
+    if first in _NUMBER_WORDS and rest:
+        quantity, unit, text = float(_NUMBER_WORDS[first]), "", rest
+
+    match = _QUANTITY.match(text)
+    if match:
+        quantity = float(match.group(1).replace(",", "."))
+        raw_unit, text = (match.group(2) or "").lower(), match.group(3)
+        if raw_unit in _UNITS:
+            unit, factor = _UNITS[raw_unit]
+            quantity *= factor
+        else:
+            unit = ""
+            text = f"{raw_unit} {text}".strip()
+
+    name = normalize_ingredient(text)
+    if not name:
+        return None
+    return name, unit, quantity, display_name(text) or name
+
+
+def parse_ingredients(text: str) -> List[ParsedIngredient]:
+    text = _LEAD_IN.sub("", (text or "").strip().rstrip(".!"))
+    items = []
+    for chunk in _SPLIT.split(text):
+        chunk = _LEAD_IN.sub("", chunk)
+        parsed = parse_ingredient(chunk) if chunk else None
+        if parsed:
+            items.append(parsed)
+    return items
+
+
+def _entry(name: str, value: Any) -> Dict[str, Any]:
+    """Entrée d'inventaire; accepte l'ancien format {unité: quantité} (slots déjà stockés)."""
+
+    if isinstance(value, dict) and isinstance(value.get("amounts"), dict):
+        return {"label": value.get("label") or name, "amounts": dict(value["amounts"])}
+    return {"label": name, "amounts": dict(value) if isinstance(value, dict) else {}}
+
+
+def merge_inventory(inventory: Optional[Dict[str, Any]], items: Iterable[ParsedIngredient]) -> Inventory:
+    """Ajoute des ingrédients; un doublon sans quantité ne change rien, les quantités de même unité s'additionnent."""
+
+    merged: Inventory = {name: _entry(name, value) for name, value in (inventory or {}).items()}
+
+    for name, unit, quantity, label in items:
+        entry = merged.setdefault(name, {"label": label or name, "amounts": {}})
+        if quantity is None:
+            continue
+        key = unit or ""
+        amounts = entry["amounts"]
+        amounts[key] = round(amounts.get(key, 0.0) + quantity, 3)
+    return merged
+
+
+def inventory_names(inventory: Optional[Dict[str, Any]]) -> List[str]:
+    """Clés normalisées (spécification et clé de cache des fiches)."""
+
+    return sorted((inventory or {}).keys())
+
+
+def inventory_labels(inventory: Optional[Dict[str, Any]]) -> List[str]:
+    """Noms affichés, dans l'ordre des clés ("noix", "tomates")."""
+
+    return [_entry(name, (inventory or {})[name])["label"] for name in inventory_names(inventory)]
+
+
+def describe_inventory(inventory: Optional[Dict[str, Any]]) -> List[str]:
+    """Noms affichés avec leurs quantités, pour le prompt ("tomates (3)", "farine (200 g)")."""
+
+    described = []
+    for name in inventory_names(inventory):
+        entry = _entry(name, (inventory or {})[name])
+        amounts = []
+        for unit, quantity in sorted(entry["amounts"].items()):
+            amount = int(quantity) if float(quantity).is_integer() else quantity
+            amounts.append(f"{amount} {unit}".strip())
+        described.append(f"{entry['label']} ({', '.join(amounts)})" if amounts else entry["label"])
+    return described
+
+
+def inventory_fingerprint(inventory: Optional[Dict[str, Any]]) -> str:
+    return json.dumps(inventory or {}, sort_keys=True, ensure_ascii=False)
+
+
+def _covers(have: str, needed: str) -> bool:
+    return have == needed or f" {have} " in f" {needed} "
+
+
+class RecipeIndex:
+    """Index inversé ingrédient -> fiches du RecipeStore, reconstruit quand le cache change."""
+
+    def __init__(self, store: Optional[RecipeStore] = None) -> None:
+        self._store = store
+        self._version: Optional[Tuple[int, float]] = None
+        self._entries: List[Dict[str, Any]] = []
+        self._postings: Dict[str, List[int]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def store(self) -> RecipeStore:
+        # `is not None`: un RecipeStore vide est faux (__len__).
+        return self._store if self._store is not None else get_recipe_store()
+
+    def refresh(self) -> None:
+        """Relit le cache de fiches s'il a changé depuis la dernière fois.
+
+        La version (nombre de fiches, dernier `created_at`) voit aussi une fiche
+        remplacée sous la même clé (mode patch, pré-génération relancée).
+        """
+
+        with self._lock:
+            store = self.store
+            version = store.version()
+            if version == self._version:
+                return
+
+            entries: List[Dict[str, Any]] = []
+            postings: Dict[str, List[int]] = {}
+            for key, _, card in store.items():
+                recipe = card.get("recipe") if isinstance(card, dict) else None
+                if not isinstance(recipe, dict):
+                    continue
+                needed: Dict[str, bool] = {}
+                for ingredient in recipe.get("ingredients") or []:
+                    if not isinstance(ingredient, dict):
+                        continue
+                    name = normalize_ingredient(ingredient.get("name"))
+                    if name:
+                        # Un ingrédient remplaçable n'est jamais bloquant.
+                        critical = bool(ingredient.get("critical")) and not ingredient.get("alternative")
+                        needed[name] = needed.get(name, False) or critical
+                if not needed:
+                    continue
+                idx = len(entries)
+                entries.append(
+                    {
+                        "key": key,
+                        "name": recipe.get("name"),
+                        "total_min": (recipe.get("times") or {}).get("total_min"),
+                        "needed": needed,
+                    }
+                )
+                for name in needed:
+                    for word in name.split():
+                        postings.setdefault(word, []).append(idx)
+
+            self._entries, self._postings, self._version = entries, postings, version
+
+    def candidates(self, inventory: Optional[Dict[str, Any]], limit: int = 3) -> List[Dict[str, Any]]:
+        have = inventory_names(inventory)
+        if not have:
+            return []
+
+        self.refresh()
+        with self._lock:
+            entries, postings = self._entries, self._postings
+
+        seen = set()
+        for name in have:
+            for word in name.split():
+                seen.update(postings.get(word, ()))
+
+        scored = []
+        for idx in seen:
+            entry = entries[idx]
+            matched = [n for n in entry["needed"] if any(_covers(h, n) for h in have)]
+            if not matched:
+                continue
+            missing = [n for n in entry["needed"] if n not in matched]
+            missing_critical = [n for n in missing if entry["needed"][n]]
+            score = len(matched) / len(entry["needed"])
+            scored.append(
+                (
+                    len(missing_critical),
+                    -score,
+                    entry["total_min"] or 0,
+                    {
+                        "key": entry["key"],
+                        "name": entry["name"],
+                        "score": round(score, 3),
+                        "total_min": entry["total_min"],
+                        "missing": missing,
+                        "missing_critical": missing_critical,
+                    },
+                )
+            )
+
+        scored.sort(key=lambda item: item[:3])
+        return [item[3] for item in scored[:limit]]
+
+
+class CandidateSearch:
+    """Recherche des candidates en arrière-plan, regroupée (debounce) par conversation.
+
+    - `schedule(...)`: (re)programme la recherche après INVENTORY_DEBOUNCE_S
+    - `result(...)`: résultat pour cet inventaire (consommé); calculé tout de suite s'il n'est pas prêt
+
+    Résultats en attente et fiches déjà pré-générées sont bornés (LRU, `max_sessions`):
+    une conversation abandonnée avant "c'est tout" ne reste pas en mémoire.
+    """
+
+    def __init__(
+        self,
+        index: Optional[RecipeIndex] = None,
+        debounce_s: Optional[float] = None,
+        max_sessions: int = 1024,
+    ) -> None:
+        self.index = index or RecipeIndex()
+        self.debounce_s = max(
+            0.0, debounce_s if debounce_s is not None else float_env("INVENTORY_DEBOUNCE_S", 0.5)
+        )
+        self.limit = max(1, int(float_env("INVENTORY_CANDIDATES", 3)))
+        self.max_sessions = max(1, int(max_sessions))
+        self._lock = threading.Lock()
+        self._timers: Dict[str, threading.Timer] = {}
+        self._results: "OrderedDict[str, Tuple[str, List[Dict[str, Any]]]]" = OrderedDict()
+        self._prewarmed: "OrderedDict[str, None]" = OrderedDict()
+        self._prewarm_pool: Optional[ThreadPoolExecutor] = None
+
+    def schedule(
+        self,
+        sender_id: str,
+        inventory: Inventory,
+        prewarm: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ) -> None:
+        """`prewarm`: (prompt, spec) de la fiche à générer si aucune candidate ne couvre l'inventaire."""
+
+        timer = threading.Timer(self.debounce_s, self._run, args=(sender_id, inventory, prewarm))
+        timer.daemon = True
+        with self._lock:
+            previous = self._timers.pop(sender_id, None)
+            if previous is not None:
+                previous.cancel()
+            self._timers[sender_id] = timer
+        timer.start()
+
+    def _run(
+        self,
+        sender_id: str,
+        inventory: Inventory,
+        prewarm: Optional[Tuple[str, Dict[str, Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        try:
+            candidates = self.index.candidates(inventory, limit=self.limit)
+        except Exception:
+            return []
+
+        with self._lock:
+            self._results[sender_id] = (inventory_fingerprint(inventory), candidates)
+            self._results.move_to_end(sender_id)
+            while len(self._results) > self.max_sessions:
+                self._results.popitem(last=False)
+            if self._timers.get(sender_id) is threading.current_thread():
+                self._timers.pop(sender_id, None)
+
+        fully_covered = bool(candidates) and not candidates[0]["missing_critical"]
+        if prewarm is not None and not fully_covered and truthy_env("INVENTORY_PREWARM", default=False):
+            self._prewarm(*prewarm)
+        return candidates
+
+    def _prewarm(self, prompt: str, spec: Dict[str, Any]) -> None:
+        key = recipe_key(spec)
+        with self._lock:
+            if key in self._prewarmed:
+                return
+            self._prewarmed[key] = None
+            while len(self._prewarmed) > self.max_sessions:
+                self._prewarmed.popitem(last=False)
+            if self._prewarm_pool is None:
+                self._prewarm_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recipe-prewarm")
+            pool = self._prewarm_pool
+
+        # Import local: recipe_actions importe ce module.
+        from .recipe_actions import generate_recipe_card
+
+        def job() -> None:
+            try:
+                generate_recipe_card(prompt, spec)
+            except Exception:
+                with self._lock:
+                    self._prewarmed.pop(key, None)
+
+        pool.submit(job)
+
+    def result(self, sender_id: str, inventory: Inventory) -> List[Dict[str, Any]]:
+        fingerprint = inventory_fingerprint(inventory)
+        with self._lock:
+            timer = self._timers.pop(sender_id, None)
+            cached = self._results.pop(sender_id, None)
+        if timer is not None:
+            timer.cancel()
+        if cached is not None and cached[0] == fingerprint:
+            return cached[1]
+        candidates = self._run(sender_id, inventory)
+        with self._lock:
+            self._results.pop(sender_id, None)
+        return candidates
+
+    def forget(self, sender_id: str) -> None:
+        with self._lock:
+            timer = self._timers.pop(sender_id, None)
+            self._results.pop(sender_id, None)
+        if timer is not None:
+            timer.cancel()
+
+
+_SEARCH: Optional[CandidateSearch] = None
+_SEARCH_LOCK = threading.Lock()
+
+
+def get_candidate_search() -> CandidateSearch:
+    global _SEARCH
+    with _SEARCH_LOCK:
+        if _SEARCH is None:
+            _SEARCH = CandidateSearch()
+        return _SEARCH
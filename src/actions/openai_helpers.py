@@ -1,21 +1,35 @@
 from __future__ import annotations
 
-import base64
+import hashlib
 import json
 import os
+import threading
 import uuid
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
+from .audio import truthy_env
 
-def call_openai_json(prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
-    """Appel OpenAI qui retourne un dict JSON (robuste).
 
-    - Utilise `responses.create(..., response_format=json_schema)` si dispo.
-    - Sinon fallback sur `chat.completions.create(..., response_format=json_object)`.
+RECIPE_SYSTEM_PROMPT = (
+    "Tu es un assistant de cuisine. "
+    "Tu dois produire une sortie JSON STRICTE conforme au schéma. "
+    "Ne mets jamais de texte hors JSON. "
+    "Si une alternative n'existe pas, mets alternative=null. "
+    "Si un ingrédient est critique, mets alternative=null."
+)
 
-    Requis: variable d'environnement OPENAI_API_KEY.
-    Optionnel: OPENAI_MODEL (défaut: gpt-4o-mini).
+
+_CLIENTS: Dict[Tuple[str, Optional[str]], Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def openai_client() -> Any:
+    """Client OpenAI configuré (OPENAI_API_KEY requis), partagé par le process.
+
+    Un seul client par (clé, OPENAI_BASE_URL): son pool de connexions HTTP reste
+    ouvert entre les appels (pas de nouveau DNS/TLS à chaque action).
+    Lève RuntimeError si la librairie ou la clé manque.
     """
 
     try:
@@ -31,17 +45,30 @@ def call_openai_json(prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
             "OPENAI_API_KEY n'est pas défini. Configure la variable d'environnement et réessaie."
         )
 
+    key = (api_key, os.getenv("OPENAI_BASE_URL"))
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = OpenAI(api_key=api_key)
+        return client
+
+
+def call_openai_json(prompt: str, schema: Dict[str, Any], required_key: str = "recipe") -> Dict[str, Any]:
+    """Appel OpenAI qui retourne un dict JSON (robuste).
+
+    - Utilise `responses.create(..., response_format=json_schema)` si dispo.
+    - Sinon fallback sur `chat.completions.create(..., response_format=json_object)`.
+    - `required_key`: clé objet attendue à la racine ("recipe", "patch", ...).
+
+    Requis: variable d'environnement OPENAI_API_KEY.
+    Optionnel: OPENAI_MODEL (défaut: gpt-4o-mini).
+    """
+
     model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
 
-    client = OpenAI(api_key=api_key)
+    client = openai_client()
 
-    system = (
-        "Tu es un assistant de cuisine. "
-        "Tu dois produire une sortie JSON STRICTE conforme au schéma. "
-        "Ne mets jamais de texte hors JSON. "
-        "Si une alternative n'existe pas, mets alternative=null. "
-        "Si un ingrédient est critique, mets alternative=null."
-    )
+    system = RECIPE_SYSTEM_PROMPT
 
     text: Optional[str] = None
     try:
@@ -84,18 +111,54 @@ def call_openai_json(prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
             f"Réponse non-JSON ou JSON invalide: {exc}. Extrait: {snippet}"
         ) from exc
 
-    if not isinstance(data, dict) or "recipe" not in data or not isinstance(data.get("recipe"), dict):
-        raise RuntimeError(f"JSON inattendu (clé 'recipe' manquante): {data}")
+    if not isinstance(data, dict) or not isinstance(data.get(required_key), dict):
+        raise RuntimeError(f"JSON inattendu (clé '{required_key}' manquante): {data}")
 
     return data
 
 
-def call_openai_tts(text: str) -> Dict[str, str]:
+QA_SYSTEM_PROMPT = (
+    "Tu es un assistant de cuisine. "
+    "Réponds à la question en une ou deux phrases courtes, en français, sans préambule."
+)
+
+
+def call_openai_text(prompt: str, system: str = QA_SYSTEM_PROMPT, max_tokens: int = 120) -> str:
+    """Appel OpenAI court (texte libre), pour les questions hors glossaire.
+
+    Requis: OPENAI_API_KEY
+    Optionnel: OPENAI_QA_MODEL (défaut: OPENAI_MODEL, puis gpt-4o-mini)
+    """
+
+    model = os.getenv("OPENAI_QA_MODEL") or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+
+    client = openai_client()
+    resp = client.chat.completions.create(
+        model=model,
+        messages=[
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens=max_tokens,
+        temperature=0.2,
+    )
+    text = (resp.choices[0].message.content or "").strip()
+    if not text:
+        raise RuntimeError("Réponse OpenAI vide.")
+    return text
+
+
+def tts_cache_key(text: str, model: str, voice: str, audio_format: str) -> str:
+    raw = "\x1f".join([model, voice, audio_format.lower(), text.strip()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def call_openai_tts(text: str) -> Dict[str, Any]:
     """Appel OpenAI Text-to-Speech.
 
     Retourne un dict avec:
-      - audio_base64 (pour lecture côté client)
-      - file_path (audio sauvegardé localement, utile en debug)
+      - file_path / file_name (audio sauvegardé dans TTS_OUTPUT_DIR, servi par /tts/<file_name>)
+      - size_bytes, mime_type
 
     Requis: OPENAI_API_KEY
     Optionnel:
@@ -103,21 +166,10 @@ def call_openai_tts(text: str) -> Dict[str, str]:
       - OPENAI_TTS_VOICE (défaut: alloy)
       - OPENAI_TTS_FORMAT (défaut: wav)
       - TTS_OUTPUT_DIR (défaut: tts_outputs)
+      - TTS_CACHE (défaut: true): nom de fichier dérivé de (modèle, voix, format, texte);
+        un texte déjà synthétisé est relu depuis TTS_OUTPUT_DIR sans appel réseau
     """
 
-    try:
-        from openai import OpenAI
-    except ModuleNotFoundError as exc:
-        raise RuntimeError(
-            "La librairie 'openai' n'est pas installée. Installe-la puis relance l'action server."
-        ) from exc
-
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError(
-            "OPENAI_API_KEY n'est pas défini. Configure la variable d'environnement et réessaie."
-        )
-
     model = os.getenv("OPENAI_TTS_MODEL", "tts-1")
     voice = os.getenv("OPENAI_TTS_VOICE", "alloy")
     audio_format = os.getenv("OPENAI_TTS_FORMAT", "wav")
@@ -125,16 +177,34 @@ def call_openai_tts(text: str) -> Dict[str, str]:
     out_dir = Path(os.getenv("TTS_OUTPUT_DIR", "tts_outputs"))
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    filename = f"tts_{uuid.uuid4().hex}.{audio_format}"
+    mime_type = "audio/mpeg" if audio_format.lower() in {"mp3", "mpeg"} else f"audio/{audio_format}"
+
+    use_cache = truthy_env("TTS_CACHE", default=True)
+    if use_cache:
+        filename = f"tts_{tts_cache_key(text, model, voice, audio_format)}.{audio_format}"
+    else:
+        filename = f"tts_{uuid.uuid4().hex}.{audio_format}"
     file_path = out_dir / filename
 
-    client = OpenAI(api_key=api_key)
+    if use_cache and file_path.is_file() and file_path.stat().st_size > 0:
+        return {
+            "text": text,
+            "mime_type": mime_type,
+            "file_path": str(file_path),
+            "file_name": filename,
+            "size_bytes": file_path.stat().st_size,
+            "model": model,
+            "voice": voice,
+            "cached": True,
+        }
+
+    client = openai_client()
 
     response = client.audio.speech.create(
         model=model,
         voice=voice,
         input=text,
-        format=audio_format,
+        response_format=audio_format,
     )
 
     audio_bytes: Optional[bytes] = None
@@ -151,16 +221,18 @@ def call_openai_tts(text: str) -> Dict[str, str]:
     if not audio_bytes:
         raise RuntimeError("Réponse OpenAI TTS vide.")
 
-    file_path.write_bytes(audio_bytes)
-
-    mime_type = "audio/mpeg" if audio_format.lower() in {"mp3", "mpeg"} else f"audio/{audio_format}"
-    audio_b64 = base64.b64encode(audio_bytes).decode("ascii")
+    # Écriture atomique: un fichier du cache n'est jamais visible à moitié écrit.
+    tmp_path = file_path.with_name(f".{filename}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(audio_bytes)
+    os.replace(tmp_path, file_path)
 
     return {
         "text": text,
         "mime_type": mime_type,
-        "audio_base64": audio_b64,
         "file_path": str(file_path),
+        "file_name": filename,
+        "size_bytes": len(audio_bytes),
         "model": model,
         "voice": voice,
+        "cached": False,
     }
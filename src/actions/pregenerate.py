@@ -0,0 +1,305 @@
+"""Pré-génération hors ligne des fiches recettes (avant le coup de feu).
+
+Lit une liste de specs (JSON ou JSONL), génère les fiches via OpenAI, les valide
+contre RECIPE_SCHEMA et les écrit dans le cache persistant (RecipeStore), plus
+optionnellement l'audio des étapes dans le cache TTS.
+
+Une spec: {"name": "pâtes carbonara", "servings": 2, "time_max": 30,
+           "constraints": ["sans porc"], "difficulty": "débutant"}
+ou, pour une combinaison frigo: {"ingredients": ["oeufs", "tomates", "riz"], ...}
+
+Usage (depuis `src/`):
+    python -m actions.pregenerate specs.jsonl --workers 4
+    python -m actions.pregenerate specs.jsonl --mode batch     # API Batch OpenAI
+    python -m actions.pregenerate specs.jsonl --tts            # + audio des étapes
+
+Reprise: les specs déjà traitées sont notées dans le fichier --checkpoint
+(défaut: <specs>.checkpoint.json) et sautées au redémarrage.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .openai_helpers import RECIPE_SYSTEM_PROMPT, call_openai_json, call_openai_tts, openai_client
+from .recipe_actions import (
+    build_recipe_prompt_from_ingredients,
+    build_recipe_prompt_from_name,
+    format_step_text,
+)
+from .recipe_store import RecipeStore, recipe_key, recipe_spec_from_dict
+from .schemas import RECIPE_SCHEMA, validate_json_schema
+
+
+_BATCH_FINAL_STATES = {"completed", "failed", "expired", "cancelled"}
+
+
+def load_specs(path: str) -> List[Dict[str, Any]]:
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if not text:
+        return []
+    if text.startswith("["):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    return [item for item in items if isinstance(item, dict)]
+
+
+def build_prompt(item: Dict[str, Any]) -> str:
+    """Même prompt que les actions Rasa, pour que la fiche serve au runtime."""
+
+    if item.get("ingredients") and not item.get("name"):
+        return build_recipe_prompt_from_ingredients(
+            item.get("ingredients"), item.get("constraints"), item.get("time_max"), item.get("servings")
+        )
+    return build_recipe_prompt_from_name(
+        item.get("name"), item.get("servings"), item.get("time_max"), item.get("constraints"), item.get("difficulty")
+    )
+
+
+class Checkpoint:
+    """État de reprise, réécrit atomiquement après chaque fiche."""
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.done: List[str] = []
+        self.failed: Dict[str, str] = {}
+        self.batch_id: Optional[str] = None
+        self._lock = threading.Lock()
+        if self.path.is_file():
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            self.done = list(data.get("done") or [])
+            self.failed = dict(data.get("failed") or {})
+            self.batch_id = data.get("batch_id")
+
+    def _write(self) -> None:
+        payload = {"done": self.done, "failed": self.failed, "batch_id": self.batch_id}
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent or "."), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def mark_done(self, key: str) -> None:
+        with self._lock:
+            self.done.append(key)
+            self.failed.pop(key, None)
+            self._write()
+
+    def mark_failed(self, key: str, error: str) -> None:
+        with self._lock:
+            self.failed[key] = error
+            self._write()
+
+    def set_batch(self, batch_id: Optional[str]) -> None:
+        with self._lock:
+            self.batch_id = batch_id
+            self._write()
+
+
+class Progress:
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.ok = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record(self, ok: bool, label: str, detail: str = "") -> None:
+        with self._lock:
+            if ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+            done = self.ok + self.failed
+            status = "ok" if ok else f"ÉCHEC: {detail}"
+            print(f"[{done}/{self.total}] {label} -> {status} ({self.rate():.1f} recettes/min)", flush=True)
+
+    def rate(self) -> float:
+        minutes = (time.monotonic() - self.started) / 60.0
+        return self.ok / minutes if minutes > 0 else 0.0
+
+
+def _store_card(
+    store: RecipeStore, key: str, spec: Dict[str, Any], data: Dict[str, Any], with_tts: bool
+) -> Optional[str]:
+    """Valide et enregistre une fiche. Retourne un message d'erreur ou None."""
+
+    errors = validate_json_schema(data, RECIPE_SCHEMA)
+    if errors:
+        return "; ".join(errors[:3])
+
+    store.put(key, spec, data)
+
+    if with_tts:
+        for idx, step in enumerate(data["recipe"]["steps"]):
+            text = format_step_text(step, idx)
+            if text:
+                call_openai_tts(text)
+    return None
+
+
+def run_pool(
+    pending: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+    store: RecipeStore,
+    checkpoint: Checkpoint,
+    progress: Progress,
+    workers: int,
+    with_tts: bool,
+) -> None:
+    def job(item: Dict[str, Any]) -> Dict[str, Any]:
+        return call_openai_json(build_prompt(item), schema=RECIPE_SCHEMA)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(job, item): (key, spec, item) for key, spec, item in pending}
+        for future in as_completed(futures):
+            key, spec, item = futures[future]
+            label = item.get("name") or ", ".join(spec["ingredients"])
+            try:
+                error = _store_card(store, key, spec, future.result(), with_tts)
+            except Exception as exc:
+                error = str(exc)
+            if error:
+                checkpoint.mark_failed(key, error)
+            else:
+                checkpoint.mark_done(key)
+            progress.record(error is None, label, error or "")
+
+
+def run_batch(
+    pending: List[Tuple[str, Dict[str, Any], Dict[str, Any]]],
+    store: RecipeStore,
+    checkpoint: Checkpoint,
+    progress: Progress,
+    with_tts: bool,
+    poll_s: float,
+) -> None:
+    """Mode fichier batch OpenAI (/v1/chat/completions): moins cher, résultat différé."""
+
+    client = openai_client()
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    by_key = {key: (spec, item) for key, spec, item in pending}
+
+    if not checkpoint.batch_id:
+        fd, input_path = tempfile.mkstemp(prefix="pregen_batch_", suffix=".jsonl")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            for key, _, item in pending:
+                request = {
+                    "custom_id": key,
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": model,
+                        "messages": [
+                            {"role": "system", "content": RECIPE_SYSTEM_PROMPT},
+                            {"role": "user", "content": build_prompt(item)},
+                        ],
+                        "response_format": {"type": "json_object"},
+                        "temperature": 0.2,
+                    },
+                }
+                handle.write(json.dumps(request, ensure_ascii=False) + "\n")
+
+        with open(input_path, "rb") as handle:
+            batch_file = client.files.create(file=handle, purpose="batch")
+        batch = client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        checkpoint.set_batch(batch.id)
+        print(f"Batch soumis: {batch.id} ({len(pending)} fiches)", flush=True)
+
+    while True:
+        batch = client.batches.retrieve(checkpoint.batch_id)
+        if batch.status in _BATCH_FINAL_STATES:
+            break
+        print(f"Batch {batch.id}: {batch.status}...", flush=True)
+        time.sleep(poll_s)
+
+    if batch.status != "completed" or not batch.output_file_id:
+        checkpoint.set_batch(None)
+        raise RuntimeError(f"Batch {batch.id} terminé avec le statut '{batch.status}'.")
+
+    output = client.files.content(batch.output_file_id).text
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        key = result.get("custom_id")
+        if key not in by_key:
+            continue
+        spec, item = by_key[key]
+        label = item.get("name") or ", ".join(spec["ingredients"])
+        try:
+            body = (result.get("response") or {}).get("body") or {}
+            content = body["choices"][0]["message"]["content"]
+            error = _store_card(store, key, spec, json.loads(content), with_tts)
+        except Exception as exc:
+            error = f"réponse inexploitable: {exc}"
+        if error:
+            checkpoint.mark_failed(key, error)
+        else:
+            checkpoint.mark_done(key)
+        progress.record(error is None, label, error or "")
+
+    checkpoint.set_batch(None)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pré-génère des fiches recettes dans le cache.")
+    parser.add_argument("specs", help="fichier JSON (liste) ou JSONL de specs")
+    parser.add_argument("--mode", choices=["pool", "batch"], default="pool")
+    parser.add_argument("--workers", type=int, default=4, help="taille du pool (mode pool)")
+    parser.add_argument("--checkpoint", default=None, help="fichier de reprise")
+    parser.add_argument("--store", default=None, help="chemin du RecipeStore (défaut: RECIPE_STORE_PATH)")
+    parser.add_argument("--tts", action="store_true", help="pré-synthétise l'audio des étapes")
+    parser.add_argument("--retry-failed", action="store_true", help="retente les specs en échec")
+    parser.add_argument("--poll", type=float, default=30.0, help="intervalle de suivi du batch (s)")
+    args = parser.parse_args(argv)
+
+    store = RecipeStore(args.store)
+    checkpoint = Checkpoint(args.checkpoint or f"{args.specs}.checkpoint.json")
+    done = set(checkpoint.done)
+
+    pending: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+    seen = set()
+    for item in load_specs(args.specs):
+        spec = recipe_spec_from_dict(item)
+        key = recipe_key(spec)
+        if key in seen or key in done or store.has(key):
+            continue
+        if key in checkpoint.failed and not args.retry_failed:
+            continue
+        seen.add(key)
+        pending.append((key, spec, item))
+
+    print(f"{len(pending)} fiche(s) à générer ({len(done)} déjà faites, {len(store)} en cache).", flush=True)
+    if not pending and not checkpoint.batch_id:
+        return 0
+
+    progress = Progress(len(pending))
+    if args.mode == "batch":
+        run_batch(pending, store, checkpoint, progress, args.tts, args.poll)
+    else:
+        run_pool(pending, store, checkpoint, progress, args.workers, args.tts)
+
+    elapsed = time.monotonic() - progress.started
+    print(
+        f"Terminé: {progress.ok} ok, {progress.failed} échec(s) en {elapsed:.1f}s "
+        f"-> {progress.rate():.1f} recettes/min",
+        flush=True,
+    )
+    return 0 if progress.failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Text
+
+from rasa_sdk import Action, Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from .openai_helpers import call_openai_text
+from .qa_index import answer_from_recipe, get_glossary_qa
+from .recipe_actions import current_recipe, current_recipe_steps
+
+
+class ActionAnswerQuestion(Action):
+    """Répond aux questions de cuisine ("c'est quoi dorer ?", "combien de temps pour l'étape 3 ?").
+
+    Ordre: recette en cours, puis glossaire indexé, puis LLM (sous QA_MIN_CONFIDENCE);
+    la réponse du LLM est apprise pour les questions suivantes. Si le LLM échoue, la
+    réponse locale n'est servie qu'au-dessus de QA_FALLBACK_CONFIDENCE.
+    """
+
+    def name(self) -> Text:
+        return "action_answer_question"
+
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+
+        question = ((tracker.latest_message or {}).get("text") or "").strip()
+        if not question:
+            return []
+
+        try:
+            current_index = int(float(tracker.get_slot("step_index") or 0))
+        except (TypeError, ValueError):
+            current_index = 0
+
+        answer = answer_from_recipe(
+            question,
+            current_recipe(tracker),
+            current_recipe_steps(tracker),
+            current_index,
+        )
+        if answer:
+            dispatcher.utter_message(text=answer)
+            return []
+
+        qa = get_glossary_qa()
+        hit = qa.lookup(question)
+        if hit and hit["confidence"] >= qa.min_confidence:
+            dispatcher.utter_message(text=hit["answer"])
+            return []
+
+        try:
+            answer = call_openai_text(question)
+        except Exception:
+            answer = None
+
+        if answer:
+            qa.learn(question, answer)
+            dispatcher.utter_message(text=answer)
+        elif hit and hit["confidence"] >= qa.fallback_confidence:
+            dispatcher.utter_message(text=hit["answer"])
+        else:
+            dispatcher.utter_message(
+                text="Je n'ai pas de réponse à ça pour l'instant. Tu peux reformuler, ou dire 'répète' pour réentendre l'étape."
+            )
+        return []
@@ -0,0 +1,283 @@
+"""Questions de cuisine sans LLM: index BM25 du glossaire + contexte de la recette en cours.
+
+- glossaire: `glossary.json` (techniques, repères de cuisson), chargé une fois par process
+- réponses apprises: les réponses du LLM (repli sous le seuil de confiance) sont
+  ajoutées à l'index et conservées dans QA_LEARNED_PATH (défaut: qa_learned.jsonl)
+- contexte recette: "combien de temps pour l'étape 3 ?", "how much flour?"
+
+Optionnel:
+  - QA_MIN_CONFIDENCE (défaut: 0.6): seuil sous lequel on passe au LLM
+  - QA_FALLBACK_CONFIDENCE (défaut: 0.4): confiance minimale d'une réponse locale
+    servie quand le LLM ne répond pas
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .audio import float_env
+
+
+GLOSSARY_PATH = Path(__file__).with_name("glossary.json")
+
+# Confiance d'un document dont tous les termes sont dans la question (terme exact
+# du glossaire cité dans une question plus longue: "c'est quoi blanchir des légumes").
+EXACT_TERM_CONFIDENCE = 0.9
+
+_STOPWORDS = {
+    # fr
+    "a", "au", "aux", "c", "ca", "ce", "cette", "comment", "de", "des", "du", "est", "et",
+    "il", "j", "je", "l", "la", "le", "les", "ma", "mon", "ne", "on", "ou", "pas", "pour",
+    "qu", "que", "quel", "quelle", "quoi", "si", "sur", "t", "te", "tu", "un", "une", "veut",
+    "dire", "faire", "faut", "savoir",
+    # en
+    "an", "and", "are", "be", "can", "do", "does", "for", "how", "i", "if", "in", "is", "it",
+    "its", "mean", "me", "my", "of", "s", "should", "that", "the", "this", "to", "what", "when",
+    "with",
+}
+
+_STEP_REF = re.compile(r"\b(?:step|etape)\s*(?:n\W?|no\.?|number|numero)?\s*(\d{1,2})\b")
+_ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "last": -1,
+    "premiere": 1, "deuxieme": 2, "seconde": 2, "troisieme": 3, "quatrieme": 4,
+    "cinquieme": 5, "derniere": -1,
+}
+_ORDINAL_STEP = re.compile(
+    r"\b(" + "|".join(_ORDINALS) + r")\s+(?:step|etape)\b|\b(?:step|etape)\s+(" + "|".join(_ORDINALS) + r")\b"
+)
+_CURRENT_STEP = re.compile(r"\b(?:this|current) step\b|\bcette etape\b|\betape (?:en cours|actuelle)\b")
+_DURATION = re.compile(r"\bhow long\b|\bcombien de temps\b|\bduree\b|\bminutes?\b|\btimer\b|\bminuteur\b|\bcombien de minutes\b")
+_QUANTITY = re.compile(r"\bhow (?:much|many)\b|\bcombien d\b|\bcombien de\b|\bquelle quantite\b")
+
+
+def fold(text: str) -> str:
+    """Minuscules sans accents ("Étape" -> "etape")."""
+
+    text = unicodedata.normalize("NFKD", str(text or "").lower().replace("œ", "oe"))
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", fold(text)):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith(("s", "x")) and not word.endswith("ss"):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+class BM25Index:
+    """Index inversé BM25 (ajouts incrémentaux, recherche en quelques microsecondes)."""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._docs: List[Dict[str, Any]] = []
+        self._lengths: List[int] = []
+        self._distinct: List[int] = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, text: str, payload: Dict[str, Any]) -> None:
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        with self._lock:
+            doc_id = len(self._docs)
+            self._docs.append(payload)
+            self._lengths.append(len(tokens))
+            self._distinct.append(len(set(tokens)))
+            self._total_length += len(tokens)
+            for token, tf in Counter(tokens).items():
+                self._postings.setdefault(token, {})[doc_id] = tf
+
+    def _idf(self, token: str) -> float:
+        n_docs = len(self._docs)
+        df = len(self._postings.get(token, ()))
+        return math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 3) -> List[Tuple[float, float, Dict[str, Any]]]:
+        """Retourne [(score, confiance, payload)].
+
+        La confiance est la part de l'IDF de la requête couverte par le document
+        (1.0 = tous les termes significatifs de la question sont présents), ou
+        EXACT_TERM_CONFIDENCE si tous les termes du document sont dans la question.
+        """
+
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return []
+
+        with self._lock:
+            if not self._docs:
+                return []
+            avg_length = self._total_length / len(self._docs)
+            idf = {token: self._idf(token) for token in tokens}
+            scores: Dict[int, float] = {}
+            covered: Dict[int, float] = {}
+            matched: Dict[int, int] = {}
+            for token in tokens:
+                for doc_id, tf in self._postings.get(token, {}).items():
+                    norm = self.k1 * (1.0 - self.b + self.b * self._lengths[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf[token] * tf * (self.k1 + 1.0) / (tf + norm)
+                    covered[doc_id] = covered.get(doc_id, 0.0) + idf[token]
+                    matched[doc_id] = matched.get(doc_id, 0) + 1
+            total_idf = sum(idf.values()) or 1.0
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+            results = []
+            for doc_id, score in best:
+                confidence = covered[doc_id] / total_idf
+                if matched[doc_id] >= self._distinct[doc_id]:
+                    confidence = max(confidence, EXACT_TERM_CONFIDENCE)
+                results.append((score, confidence, self._docs[doc_id]))
+            return results
+
+
+class GlossaryQA:
+    """Glossaire indexé + réponses apprises du LLM."""
+
+    def __init__(self, glossary_path: Optional[str] = None, learned_path: Optional[str] = None) -> None:
+        self.index = BM25Index()
+        self.learned_path = Path(learned_path or os.getenv("QA_LEARNED_PATH", "qa_learned.jsonl"))
+        self.min_confidence = float_env("QA_MIN_CONFIDENCE", 0.6)
+        self.fallback_confidence = float_env("QA_FALLBACK_CONFIDENCE", 0.4)
+        self._write_lock = threading.Lock()
+
+        path = Path(glossary_path) if glossary_path else GLOSSARY_PATH
+        for entry in json.loads(path.read_text(encoding="utf-8")):
+            self._add_entry(entry, source="glossary")
+
+        if self.learned_path.is_file():
+            for line in self.learned_path.read_text(encoding="utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(entry, dict) and entry.get("question") and entry.get("answer"):
+                    self._add_entry({"term": entry["question"], "answer": entry["answer"]}, source="learned")
+
+    def _add_entry(self, entry: Dict[str, Any], source: str) -> None:
+        term = entry.get("term")
+        answer = entry.get("answer")
+        if not term or not answer:
+            return
+        payload = {"term": term, "answer": answer, "source": source}
+        # Un document par formulation: le terme seul et chaque alias.
+        for text in [term, *(entry.get("aliases") or [])]:
+            self.index.add(text, payload)
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """Meilleure réponse locale avec sa confiance, ou None si rien ne correspond."""
+
+        hits = self.index.search(question, k=1)
+        if not hits:
+            return None
+        score, confidence, payload = hits[0]
+        return {**payload, "score": round(score, 3), "confidence": round(confidence, 3)}
+
+    def learn(self, question: str, answer: str) -> None:
+        """Ajoute une réponse (LLM) à l'index et au fichier des réponses apprises."""
+
+        self._add_entry({"term": question, "answer": answer}, source="learned")
+        line = json.dumps({"question": question, "answer": answer}, ensure_ascii=False)
+        with self._write_lock:
+            self.learned_path.parent.mkdir(parents=True, exist_ok=True)
+            with self.learned_path.open("a", encoding="utf-8") as handle:
+                handle.write(line + "\n")
+
+
+def _step_number(question: str, current_index: int, n_steps: int) -> Optional[int]:
+    """Numéro d'étape (1-based) visé par la question, ou None."""
+
+    folded = fold(question)
+    match = _STEP_REF.search(folded)
+    if match:
+        return int(match.group(1))
+    match = _ORDINAL_STEP.search(folded)
+    if match:
+        value = _ORDINALS[match.group(1) or match.group(2)]
+        return n_steps if value == -1 else value
+    if _CURRENT_STEP.search(folded) and current_index > 0:
+        # step_index pointe sur la prochaine étape: l'étape en cours est la précédente.
+        return current_index
+    return None
+
+
+def answer_from_recipe(
+    question: str,
+    recipe: Optional[Dict[str, Any]],
+    steps: Sequence[Dict[str, Any]],
+    current_index: int = 0,
+) -> Optional[str]:
+    """Réponse tirée de la recette en cours (durée/texte d'une étape, quantité d'un ingrédient)."""
+
+    folded = fold(question)
+
+    number = _step_number(question, current_index, len(steps)) if steps else None
+    if number is not None:
+        if not 1 <= number <= len(steps):
+            return f"La recette n'a que {len(steps)} étapes."
+        step = steps[number - 1] if isinstance(steps[number - 1], dict) else {}
+        if _DURATION.search(folded):
+            timer = step.get("timer_min")
+            if isinstance(timer, (int, float)) and timer > 0:
+                return f"Étape {number}: environ {int(timer)} min."
+            return f"L'étape {number} n'a pas de durée indiquée."
+        instruction = step.get("instruction")
+        if isinstance(instruction, str) and instruction.strip():
+            return f"Étape {number}: {instruction.strip()}"
+        return None
+
+    # "combien de temps pour cuire les pâtes" est une question de durée, pas de quantité.
+    ingredients = (recipe or {}).get("ingredients") or []
+    if ingredients and _QUANTITY.search(folded) and not _DURATION.search(folded):
+        words = set(tokenize(question))
+        for ingredient in ingredients:
+            if not isinstance(ingredient, dict):
+                continue
+            name = ingredient.get("name")
+            if not name or not set(tokenize(name)) & words:
+                continue
+            quantity = ingredient.get("quantity")
+            unit = ingredient.get("unit") or ""
+            if quantity is None:
+                return f"Pour {name}, la recette ne précise pas de quantité."
+            amount = int(quantity) if float(quantity).is_integer() else quantity
+            if unit:
+                return f"Il faut {amount} {unit} de {name}."
+            return f"Il faut {amount} {name}."
+
+    if _DURATION.search(folded) and re.search(r"\b(?:recette|recipe|total|en tout|overall)\b", folded):
+        total = ((recipe or {}).get("times") or {}).get("total_min")
+        if isinstance(total, (int, float)) and total > 0:
+            return f"La recette prend environ {int(total)} min au total."
+
+    return None
+
+
+_QA: Optional[GlossaryQA] = None
+_QA_LOCK = threading.Lock()
+
+
+def get_glossary_qa() -> GlossaryQA:
+    """Index partagé par le process (construit à la première question)."""
+
+    global _QA
+    with _QA_LOCK:
+        if _QA is None:
+            _QA = GlossaryQA()
+        return _QA
@@ -1,14 +1,184 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Text
+from typing import Any, Dict, List, Optional, Text, Tuple
 
 from rasa_sdk import Action, Tracker
 from rasa_sdk.executor import CollectingDispatcher
 from rasa_sdk.events import SlotSet
 
+from .audio import stop_audio_playback
+from .inventory import (
+    describe_inventory,
+    display_name,
+    get_candidate_search,
+    inventory_labels,
+    inventory_names,
+    merge_inventory,
+    normalize_ingredient,
+    parse_ingredients,
+)
 from .openai_helpers import call_openai_json
-from .schemas import RECIPE_SCHEMA
+from .recipe_patch import patch_recipe_card, spec_delta
+from .recipe_store import get_recipe_store, recipe_key, recipe_spec
+from .schemas import RECIPE_SCHEMA, validate_json_schema
+
+
+def build_recipe_prompt_from_ingredients(
+    ingredients: Any, contraintes: Any, temps_max: Any, nb_personnes: Any
+) -> str:
+    return (
+        "Tu es un assistant de cuisine. Tu dois répondre UNIQUEMENT en JSON valide, "
+        "sans texte autour. La réponse doit respecter exactement le schéma demandé.\n\n"
+        "Contexte utilisateur: il donne des ingrédients disponibles, et veut une recette faisable.\n\n"
+        f"Ingrédients disponibles: {ingredients}\n"
+        f"Contraintes (optionnel): {contraintes}\n"
+        f"Temps max (optionnel): {temps_max}\n"
+        f"Nombre de personnes (optionnel): {nb_personnes}\n"
+    )
+
+
+def build_recipe_prompt_from_name(
+    nom_recette: Any, nb_personnes: Any, temps_max: Any, contraintes: Any, difficulte: Any
+) -> str:
+    return (
+        "Tu es un assistant de cuisine. Tu dois répondre UNIQUEMENT en JSON valide, "
+        "sans texte autour. La réponse doit respecter exactement le schéma demandé.\n\n"
+        "Contexte utilisateur: il donne le NOM d'une recette, et veut une fiche complète.\n\n"
+        f"Nom de la recette: {nom_recette}\n"
+        f"Nombre de personnes (optionnel): {nb_personnes}\n"
+        f"Temps max (optionnel): {temps_max}\n"
+        f"Contraintes (optionnel): {contraintes}\n"
+        f"Difficulté souhaitée (optionnel): {difficulte}\n"
+    )
+
+
+def ingredients_request(
+    tracker: Tracker, inventory: Optional[Dict[str, Any]] = None
+) -> Tuple[str, Dict[str, Any]]:
+    """(prompt, spec) de la fiche "depuis les ingrédients" pour cette conversation.
+
+    Sans `inventory`: slot `liste_ingredients`, sinon le slot `inventory`. La spec
+    (clé de cache) prend les noms normalisés, le prompt les noms dits par
+    l'utilisateur avec leurs quantités.
+    """
+
+    listed = tracker.get_slot("liste_ingredients") if inventory is None else None
+    if listed:
+        ingredients = described = listed
+    else:
+        if inventory is None:
+            inventory = tracker.get_slot("inventory")
+        ingredients, described = inventory_names(inventory), ", ".join(describe_inventory(inventory))
+    contraintes = tracker.get_slot("contraintes")
+    temps_max = tracker.get_slot("temps_max")
+    nb_personnes = tracker.get_slot("nb_personnes")
+
+    spec = recipe_spec(
+        servings=nb_personnes,
+        time_max=temps_max,
+        constraints=contraintes,
+        ingredients=ingredients,
+    )
+    prompt = build_recipe_prompt_from_ingredients(described, contraintes, temps_max, nb_personnes)
+    return prompt, spec
+
+
+def generate_recipe_card(prompt: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Fiche depuis le cache persistant (RecipeStore), sinon via OpenAI puis mise en cache.
+
+    Seules les fiches conformes à RECIPE_SCHEMA sont mises en cache.
+    """
+
+    store = get_recipe_store()
+    key = recipe_key(spec)
+    cached = store.get(key)
+    if cached is not None:
+        return cached
+
+    data = call_openai_json(prompt, schema=RECIPE_SCHEMA)
+    if not validate_json_schema(data, RECIPE_SCHEMA):
+        store.put(key, spec, data)
+    return data
+
+
+def recipe_card_events(
+    data: Dict[str, Any], spec: Dict[str, Any], version: int = 1, step_cursor: int = 0
+) -> List[Dict[Text, Any]]:
+    """Slots de la fiche en cours (par défaut, curseur d'étapes remis au début)."""
+
+    recipe = data.get("recipe") if isinstance(data, dict) else None
+    steps = recipe.get("steps") if isinstance(recipe, dict) else None
+    return [
+        SlotSet("recipe_card", data),
+        SlotSet("recipe_steps", steps if isinstance(steps, list) else None),
+        SlotSet("recipe_spec", spec),
+        SlotSet("recipe_version", float(version)),
+        SlotSet("step_index", float(step_cursor)),
+        SlotSet("last_step_text", None),
+    ]
+
+
+def current_recipe(tracker: Tracker) -> Optional[Dict[str, Any]]:
+    """Recette en cours (objet `recipe` de la fiche) stockée dans un slot, ou None."""
+
+    # Allow storing the full recipe card JSON in a slot.
+    for slot_name in ("recipe_card", "recipe_json", "last_recipe", "recipe"):
+        raw = tracker.get_slot(slot_name)
+        if raw is None:
+            continue
+
+        if isinstance(raw, dict):
+            data = raw
+        elif isinstance(raw, str):
+            try:
+                data = json.loads(raw)
+            except Exception:
+                continue
+        else:
+            continue
+
+        recipe = data.get("recipe") if isinstance(data, dict) else None
+        if isinstance(recipe, dict):
+            return recipe
+
+    return None
+
+
+def current_recipe_steps(tracker: Tracker) -> List[Dict[str, Any]]:
+    steps_slot = tracker.get_slot("recipe_steps")
+    if isinstance(steps_slot, list) and steps_slot:
+        return steps_slot
+
+    recipe = current_recipe(tracker)
+    steps = recipe.get("steps") if recipe else None
+    if isinstance(steps, list) and steps:
+        return steps
+    return []
+
+
+def format_step_text(step: Dict[str, Any], idx: int) -> Optional[str]:
+    """Texte lu pour une étape (None si l'étape est illisible)."""
+
+    instruction = step.get("instruction")
+    if not isinstance(instruction, str) or not instruction.strip():
+        return None
+
+    step_number = step.get("index")
+    if isinstance(step_number, int):
+        text = f"Étape {step_number}: {instruction.strip()}"
+    else:
+        text = f"Étape {idx + 1}: {instruction.strip()}"
+
+    timer_min = step.get("timer_min")
+    try:
+        timer_int = int(timer_min) if timer_min is not None else None
+    except Exception:
+        timer_int = None
+
+    if timer_int is not None and timer_int > 0:
+        text = f"{text} (environ {timer_int} min)"
+    return text
 
 
 class ActionGenerateRecipeFromIngredients(Action):
@@ -22,23 +192,10 @@ class ActionGenerateRecipeFromIngredients(Action):
         domain: Dict[Text, Any],
     ) -> List[Dict[Text, Any]]:
 
-        ingredients = tracker.get_slot("liste_ingredients")
-        contraintes = tracker.get_slot("contraintes")
-        temps_max = tracker.get_slot("temps_max")
-        nb_personnes = tracker.get_slot("nb_personnes")
-
-        prompt = (
-            "Tu es un assistant de cuisine. Tu dois répondre UNIQUEMENT en JSON valide, "
-            "sans texte autour. La réponse doit respecter exactement le schéma demandé.\n\n"
-            "Contexte utilisateur: il donne des ingrédients disponibles, et veut une recette faisable.\n\n"
-            f"Ingrédients disponibles: {ingredients}\n"
-            f"Contraintes (optionnel): {contraintes}\n"
-            f"Temps max (optionnel): {temps_max}\n"
-            f"Nombre de personnes (optionnel): {nb_personnes}\n"
-        )
+        prompt, spec = ingredients_request(tracker)
 
         try:
-            data = call_openai_json(prompt, schema=RECIPE_SCHEMA)
+            data = generate_recipe_card(prompt, spec)
         except RuntimeError as exc:
             dispatcher.utter_message(text=str(exc))
             return []
@@ -50,7 +207,7 @@ class ActionGenerateRecipeFromIngredients(Action):
             text=json.dumps(data, ensure_ascii=False),
             json_message=data,
         )
-        return []
+        return recipe_card_events(data, spec)
 
 
 class ActionGenerateRecipeFromName(Action):
@@ -76,19 +233,17 @@ class ActionGenerateRecipeFromName(Action):
             )
             return []
 
-        prompt = (
-            "Tu es un assistant de cuisine. Tu dois répondre UNIQUEMENT en JSON valide, "
-            "sans texte autour. La réponse doit respecter exactement le schéma demandé.\n\n"
-            "Contexte utilisateur: il donne le NOM d'une recette, et veut une fiche complète.\n\n"
-            f"Nom de la recette: {nom_recette}\n"
-            f"Nombre de personnes (optionnel): {nb_personnes}\n"
-            f"Temps max (optionnel): {temps_max}\n"
-            f"Contraintes (optionnel): {contraintes}\n"
-            f"Difficulté souhaitée (optionnel): {difficulte}\n"
+        spec = recipe_spec(
+            name=nom_recette,
+            servings=nb_personnes,
+            time_max=temps_max,
+            constraints=contraintes,
+            difficulty=difficulte,
         )
+        prompt = build_recipe_prompt_from_name(nom_recette, nb_personnes, temps_max, contraintes, difficulte)
 
         try:
-            data = call_openai_json(prompt, schema=RECIPE_SCHEMA)
+            data = generate_recipe_card(prompt, spec)
         except RuntimeError as exc:
             dispatcher.utter_message(text=str(exc))
             return []
@@ -100,39 +255,177 @@ class ActionGenerateRecipeFromName(Action):
             text=json.dumps(data, ensure_ascii=False),
             json_message=data,
         )
-        return []
+        return recipe_card_events(data, spec)
+
+class ActionPatchRecipe(Action):
+    """Applique un changement de contraintes à la fiche en cours ("finalement sans lactose").
+
+    Le modèle ne renvoie que le diff (RECIPE_PATCH_SCHEMA): le coût suit la taille du
+    changement, pas celle de la recette. Repli sur une génération complète si le diff
+    est inutilisable.
+    """
 
-class ActionTellRecipeStep(Action):
     def name(self) -> Text:
-        return "action_tell_recipe_step"
+        return "action_patch_recipe"
 
-    def _extract_steps(self, tracker: Tracker) -> List[Dict[str, Any]]:
-        steps_slot = tracker.get_slot("recipe_steps")
-        if isinstance(steps_slot, list) and steps_slot:
-            return steps_slot
-
-        # Fallbacks: allow storing the full recipe card JSON in a slot.
-        for slot_name in ("recipe_card", "recipe_json", "last_recipe", "recipe"):
-            raw = tracker.get_slot(slot_name)
-            if raw is None:
-                continue
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+
+        card = tracker.get_slot("recipe_card")
+        if not isinstance(card, dict) or not isinstance(card.get("recipe"), dict):
+            dispatcher.utter_message(text="Je n'ai pas encore de recette à modifier. Demande d'abord une recette.")
+            return []
+
+        old_spec = tracker.get_slot("recipe_spec") or {}
+        new_spec = recipe_spec(
+            name=old_spec.get("name"),
+            servings=tracker.get_slot("nb_personnes") or old_spec.get("servings"),
+            time_max=tracker.get_slot("temps_max") or old_spec.get("time_max"),
+            constraints=tracker.get_slot("contraintes") or old_spec.get("constraints"),
+            difficulty=tracker.get_slot("difficulte") or old_spec.get("difficulty"),
+            ingredients=old_spec.get("ingredients"),
+        )
+        delta = spec_delta(old_spec, new_spec)
+        request_text = ((tracker.latest_message or {}).get("text") or "").strip() or None
+        if not delta and not request_text:
+            dispatcher.utter_message(text="Rien à changer dans la recette.")
+            return []
 
-            if isinstance(raw, dict):
-                data = raw
-            elif isinstance(raw, str):
-                try:
-                    data = json.loads(raw)
-                except Exception:
-                    continue
+        try:
+            step_cursor = int(float(tracker.get_slot("step_index") or 0))
+        except (TypeError, ValueError):
+            step_cursor = 0
+
+        store = get_recipe_store()
+        key = recipe_key(new_spec)
+        # Avant la première étape, une fiche déjà connue pour ces contraintes suffit.
+        cached = store.get(key) if delta and step_cursor == 0 else None
+        try:
+            if cached is not None:
+                new_card, new_cursor, changed_done, missed = cached, 0, [], []
             else:
-                continue
+                new_card, new_cursor, changed_done, missed = patch_recipe_card(
+                    card, delta, request_text, step_cursor
+                )
+                if delta:
+                    store.put(key, new_spec, new_card)
+        except Exception:
+            try:
+                prompt = build_recipe_prompt_from_name(
+                    new_spec.get("name") or card["recipe"].get("name"),
+                    new_spec.get("servings"),
+                    new_spec.get("time_max"),
+                    new_spec.get("constraints"),
+                    new_spec.get("difficulty"),
+                )
+                new_card = generate_recipe_card(prompt, new_spec)
+            except RuntimeError as exc:
+                dispatcher.utter_message(text=str(exc))
+                return []
+            except Exception as exc:
+                dispatcher.utter_message(text=f"Erreur lors de l'appel OpenAI: {exc}")
+                return []
+            new_cursor, changed_done, missed = 0, [], []
+
+        version = int(float(tracker.get_slot("recipe_version") or 1)) + 1
+        events = recipe_card_events(new_card, new_spec, version, step_cursor=new_cursor)
+
+        dispatcher.utter_message(
+            text=json.dumps(new_card, ensure_ascii=False),
+            json_message=new_card,
+        )
+        if changed_done:
+            if len(changed_done) == 1:
+                note = f"l'étape {changed_done[0]}, déjà faite, a changé"
+            else:
+                note = f"les étapes {', '.join(str(n) for n in changed_done)}, déjà faites, ont changé"
+            dispatcher.utter_message(text=f"Attention: {note}.")
+        # Étapes ajoutées avant l'endroit où en est l'utilisateur: lues tout de suite.
+        new_steps = new_card["recipe"].get("steps") or []
+        for number in missed:
+            text = format_step_text(new_steps[number - 1], number - 1) if number <= len(new_steps) else None
+            if text:
+                dispatcher.utter_message(text=f"Nouvelle étape, ajoutée avant celle où tu en es: {text}")
+        return events
 
-            recipe = data.get("recipe") if isinstance(data, dict) else None
-            steps = recipe.get("steps") if isinstance(recipe, dict) else None
-            if isinstance(steps, list) and steps:
-                return steps
 
-        return []
+class ActionUpdateInventory(Action):
+    """Met à jour l'inventaire à chaque énoncé d'ingrédients et relance la recherche de candidates."""
+
+    def name(self) -> Text:
+        return "action_update_inventory"
+
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+
+        latest = tracker.latest_message or {}
+        entities = [
+            e.get("value")
+            for e in latest.get("entities") or []
+            if e.get("entity") == "ingredient" and e.get("value")
+        ]
+        if entities:
+            # L'entité donne le nom; la quantité éventuelle vient du texte.
+            by_name = {item[0]: item for item in parse_ingredients(latest.get("text") or "")}
+            items = []
+            for value in entities:
+                name = normalize_ingredient(value)
+                if name:
+                    items.append(by_name.get(name, (name, None, None, display_name(value) or name)))
+        else:
+            items = parse_ingredients(latest.get("text") or "")
+
+        if not items:
+            return []
+
+        inventory = merge_inventory(tracker.get_slot("inventory"), items)
+        get_candidate_search().schedule(
+            tracker.sender_id,
+            inventory,
+            prewarm=ingredients_request(tracker, inventory),
+        )
+
+        return [
+            SlotSet("inventory", inventory),
+            SlotSet("ingredients", ", ".join(inventory_labels(inventory))),
+        ]
+
+
+class ActionFinalizeInventory(Action):
+    """Fin de saisie ("c'est tout"): remplit `candidate_recipes` (déjà calculées en arrière-plan)."""
+
+    def name(self) -> Text:
+        return "action_finalize_inventory"
+
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[Dict[Text, Any]]:
+
+        inventory = tracker.get_slot("inventory")
+        if not isinstance(inventory, dict) or not inventory:
+            return [SlotSet("candidate_recipes", [])]
+
+        candidates = get_candidate_search().result(tracker.sender_id, inventory)
+        return [SlotSet("candidate_recipes", candidates)]
+
+
+class ActionTellRecipeStep(Action):
+    def name(self) -> Text:
+        return "action_tell_recipe_step"
+
+    def _extract_steps(self, tracker: Tracker) -> List[Dict[str, Any]]:
+        return current_recipe_steps(tracker)
 
     def _get_int_slot(self, tracker: Tracker, slot_name: str, default: int = 0) -> int:
         val = tracker.get_slot(slot_name)
@@ -151,6 +444,9 @@ class ActionTellRecipeStep(Action):
         domain: Dict[Text, Any],
     ) -> List[Dict[Text, Any]]:
 
+        # Une nouvelle étape (ou une répétition) remplace l'audio encore en cours.
+        stop_audio_playback()
+
         steps = self._extract_steps(tracker)
         if not steps:
             dispatcher.utter_message(
@@ -180,28 +476,12 @@ class ActionTellRecipeStep(Action):
             return [SlotSet("step_index", float(len(steps)))]
 
         step = steps[idx] if isinstance(steps[idx], dict) else {}
-        step_number = step.get("index")
-        instruction = step.get("instruction")
-        timer_min = step.get("timer_min")
+        text = format_step_text(step, idx)
 
-        if not isinstance(instruction, str) or not instruction.strip():
+        if text is None:
             dispatcher.utter_message(text="Je n'arrive pas à lire cette étape. Dis 'suivant' pour passer à la prochaine.")
             return [SlotSet("step_index", float(idx + 1))]
 
-        prefix = "Étape"
-        if isinstance(step_number, int):
-            text = f"{prefix} {step_number}: {instruction.strip()}"
-        else:
-            text = f"{prefix} {idx + 1}: {instruction.strip()}"
-
-        try:
-            timer_int = int(timer_min) if timer_min is not None else None
-        except Exception:
-            timer_int = None
-
-        if timer_int is not None and timer_int > 0:
-            text = f"{text} (environ {timer_int} min)"
-
         dispatcher.utter_message(text=text)
 
         return [
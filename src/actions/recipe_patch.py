@@ -0,0 +1,175 @@
+"""Mode patch: modifier une fiche existante au lieu de la régénérer.
+
+Le modèle reçoit la fiche actuelle + le changement demandé et ne renvoie qu'un diff
+(RECIPE_PATCH_SCHEMA); le diff est validé puis appliqué localement. Les étapes sont
+renumérotées et le curseur `step_index` est recalé sur la nouvelle numérotation.
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from .openai_helpers import call_openai_json
+from .schemas import RECIPE_PATCH_SCHEMA, RECIPE_SCHEMA, validate_json_schema
+
+
+def spec_delta(old_spec: Dict[str, Any], new_spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Champs de la spécification qui ont changé: {champ: [avant, après]}."""
+
+    return {
+        key: [old_spec.get(key), value]
+        for key, value in new_spec.items()
+        if value != old_spec.get(key)
+    }
+
+
+def build_patch_prompt(card: Dict[str, Any], delta: Dict[str, Any], request_text: Optional[str]) -> str:
+    recipe = card["recipe"]
+    # Fiche compacte: étapes numérotées, sans espaces JSON superflus.
+    compact = json.dumps(recipe, ensure_ascii=False, separators=(",", ":"))
+    lines = [
+        "Voici une fiche recette existante (JSON):",
+        compact,
+        "",
+        "Changement demandé par l'utilisateur:",
+    ]
+    if request_text:
+        lines.append(f"- demande: {request_text}")
+    for key, (before, after) in delta.items():
+        lines.append(f"- {key}: {before} -> {after}")
+    lines += [
+        "",
+        "Retourne UNIQUEMENT un objet {\"patch\": {...}} avec ce qui change, rien d'autre:",
+        "- name/servings/times: nouvelle valeur, ou null si inchangé",
+        "- ingredients_remove: noms à retirer; ingredients_upsert: ingrédients ajoutés ou modifiés (objet complet)",
+        "- steps_remove: index d'étapes à supprimer; steps_replace: {index, instruction, timer_min}",
+        "- steps_insert: {after, instruction, timer_min} (after = index de l'étape d'origine, 0 = au début)",
+        "Les index se réfèrent à la numérotation ACTUELLE. Listes vides si rien ne change.",
+    ]
+    return "\n".join(lines)
+
+
+def _same_name(a: Any, b: Any) -> bool:
+    return " ".join(str(a or "").lower().split()) == " ".join(str(b or "").lower().split())
+
+
+def apply_recipe_patch(
+    card: Dict[str, Any], patch: Dict[str, Any], step_cursor: int = 0
+) -> Tuple[Dict[str, Any], int, List[int], List[int]]:
+    """Applique un diff à une fiche.
+
+    `step_cursor` = nombre d'étapes déjà lues (slot step_index). Retourne
+    (nouvelle fiche, nouveau curseur, numéros des étapes modifiées déjà passées,
+    numéros des nouvelles étapes insérées avant le curseur, donc jamais lues).
+    Le curseur reste sur la dernière étape d'origine déjà lue: une étape insérée
+    juste après elle est la prochaine lue.
+    Lève ValueError si le diff référence des étapes inexistantes.
+    """
+
+    new_card = copy.deepcopy(card)
+    recipe = new_card["recipe"]
+
+    for field in ("name", "servings", "times"):
+        if patch.get(field) is not None:
+            recipe[field] = patch[field]
+
+    ingredients = [
+        ing for ing in recipe.get("ingredients", [])
+        if not any(_same_name(ing.get("name"), name) for name in patch.get("ingredients_remove") or [])
+    ]
+    for upsert in patch.get("ingredients_upsert") or []:
+        for pos, ing in enumerate(ingredients):
+            if _same_name(ing.get("name"), upsert.get("name")):
+                ingredients[pos] = upsert
+                break
+        else:
+            ingredients.append(upsert)
+    recipe["ingredients"] = ingredients
+
+    old_steps = recipe.get("steps", [])
+    n_old = len(old_steps)
+
+    removed = set(patch.get("steps_remove") or [])
+    replaced = {item["index"]: item for item in patch.get("steps_replace") or []}
+    inserts: Dict[int, List[Dict[str, Any]]] = {}
+    for item in patch.get("steps_insert") or []:
+        inserts.setdefault(item["after"], []).append(item)
+
+    unknown = [i for i in [*removed, *replaced] if not 1 <= i <= n_old]
+    unknown += [i for i in inserts if not 0 <= i <= n_old]
+    if unknown:
+        raise ValueError(f"Patch invalide: étapes inexistantes {sorted(set(unknown))}")
+
+    # Chaque nouvelle étape garde son origine (numéro d'origine, ou k + 0.5 si insérée après k).
+    merged: List[Tuple[float, bool, Dict[str, Any]]] = []
+    for after in sorted(k for k in inserts if k == 0):
+        merged += [(0.5, True, step) for step in inserts[after]]
+    for number, step in enumerate(old_steps, start=1):
+        if number not in removed:
+            if number in replaced:
+                merged.append((float(number), True, replaced[number]))
+            else:
+                merged.append((float(number), False, step))
+        merged += [(number + 0.5, True, item) for item in inserts.get(number, [])]
+
+    if not merged:
+        raise ValueError("Patch invalide: la fiche n'aurait plus aucune étape.")
+
+    steps = []
+    new_cursor = 0
+    changed_done: List[int] = []
+    inserted_before: List[int] = []
+    for new_number, (origin, changed, step) in enumerate(merged, start=1):
+        steps.append(
+            {
+                "index": new_number,
+                "instruction": step.get("instruction"),
+                "timer_min": step.get("timer_min"),
+            }
+        )
+        if origin > step_cursor:
+            continue
+        if origin.is_integer():
+            # Étape d'origine (éventuellement remplacée) déjà lue.
+            new_cursor = new_number
+            if changed:
+                changed_done.append(new_number)
+        else:
+            inserted_before.append(new_number)
+    recipe["steps"] = steps
+
+    missed = [number for number in inserted_before if number < new_cursor]
+    return new_card, new_cursor, changed_done, missed
+
+
+def patch_recipe_card(
+    card: Dict[str, Any],
+    delta: Dict[str, Any],
+    request_text: Optional[str] = None,
+    step_cursor: int = 0,
+) -> Tuple[Dict[str, Any], int, List[int], List[int]]:
+    """Diff via OpenAI (RECIPE_PATCH_SCHEMA), validé puis appliqué localement.
+
+    Lève RuntimeError si le diff ou la fiche résultante est invalide.
+    """
+
+    data = call_openai_json(
+        build_patch_prompt(card, delta, request_text),
+        schema=RECIPE_PATCH_SCHEMA,
+        required_key="patch",
+    )
+    errors = validate_json_schema(data, RECIPE_PATCH_SCHEMA)
+    if errors:
+        raise RuntimeError(f"Patch non conforme: {'; '.join(errors[:3])}")
+
+    try:
+        new_card, new_cursor, changed_done, missed = apply_recipe_patch(card, data["patch"], step_cursor)
+    except ValueError as exc:
+        raise RuntimeError(str(exc)) from exc
+
+    errors = validate_json_schema(new_card, RECIPE_SCHEMA)
+    if errors:
+        raise RuntimeError(f"Fiche patchée non conforme: {'; '.join(errors[:3])}")
+    return new_card, new_cursor, changed_done, missed
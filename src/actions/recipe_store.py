@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+def _norm_text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    text = " ".join(str(value).strip().lower().split())
+    return text or None
+
+
+def _norm_int(value: Any) -> Optional[int]:
+    if value is None or value == "":
+        return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _norm_list(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        items = value.replace(";", ",").split(",")
+    elif isinstance(value, (list, tuple, set)):
+        items = list(value)
+    else:
+        items = [value]
+    return sorted({text for text in (_norm_text(item) for item in items) if text})
+
+
+def _norm_ingredients(value: Any) -> List[str]:
+    """Noms d'ingrédients canoniques, mêmes règles que l'inventaire ("oeufs, tomates et riz")."""
+
+    # Import local: inventory importe ce module.
+    from .inventory import parse_ingredient, parse_ingredients
+
+    if value is None:
+        return []
+    if isinstance(value, str):
+        parsed = parse_ingredients(value)
+    else:
+        items = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        parsed = [parse_ingredient(str(item)) for item in items if item is not None]
+    return sorted({item[0] for item in parsed if item})
+
+
+def recipe_spec(
+    name: Any = None,
+    servings: Any = None,
+    time_max: Any = None,
+    constraints: Any = None,
+    difficulty: Any = None,
+    ingredients: Any = None,
+) -> Dict[str, Any]:
+    """Spécification normalisée d'une fiche (clé de cache stable)."""
+
+    return {
+        "name": _norm_text(name),
+        "servings": _norm_int(servings),
+        "time_max": _norm_int(time_max),
+        "constraints": _norm_list(constraints),
+        "difficulty": _norm_text(difficulty),
+        "ingredients": _norm_ingredients(ingredients),
+    }
+
+
+def recipe_spec_from_dict(item: Dict[str, Any]) -> Dict[str, Any]:
+    """`recipe_spec` d'une spec brute (fichier de pré-génération, JSON...)."""
+
+    return recipe_spec(
+        name=item.get("name"),
+        servings=item.get("servings"),
+        time_max=item.get("time_max"),
+        constraints=item.get("constraints"),
+        difficulty=item.get("difficulty"),
+        ingredients=item.get("ingredients"),
+    )
+
+
+def recipe_key(spec: Dict[str, Any]) -> str:
+    raw = json.dumps(spec, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class RecipeStore:
+    """Cache persistant des fiches recettes (SQLite), indexé par spécification normalisée.
+
+    Optionnel: RECIPE_STORE_PATH (défaut: recipe_store.db)
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or os.getenv("RECIPE_STORE_PATH", "recipe_store.db")
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS recipes ("
+            "key TEXT PRIMARY KEY, spec TEXT NOT NULL, card TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._last_put = 0.0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT card FROM recipes WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def has(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM recipes WHERE key = ?", (key,)).fetchone()
+        return row is not None
+
+    def put(self, key: str, spec: Dict[str, Any], card: Dict[str, Any]) -> None:
+        with self._lock:
+            # Strictement croissant (horloge grossière): chaque écriture change `version()`.
+            self._last_put = max(time.time(), self._last_put + 1e-6)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO recipes (key, spec, card, created_at) VALUES (?, ?, ?, ?)",
+                (
+                    key,
+                    json.dumps(spec, ensure_ascii=False),
+                    json.dumps(card, ensure_ascii=False),
+                    self._last_put,
+                ),
+            )
+            self._conn.commit()
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+        """Itère sur (clé, spec, fiche) de toutes les fiches du cache."""
+
+        with self._lock:
+            rows = self._conn.execute("SELECT key, spec, card FROM recipes").fetchall()
+        for key, spec, card in rows:
+            yield key, json.loads(spec), json.loads(card)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM recipes").fetchone()[0]
+
+    def version(self) -> Tuple[int, float]:
+        """(nb de fiches, dernier `created_at`): change à chaque ajout, remplacement ou suppression."""
+
+        with self._lock:
+            count, latest = self._conn.execute("SELECT COUNT(*), MAX(created_at) FROM recipes").fetchone()
+        return count, latest or 0.0
+
+
+_STORE: Optional[RecipeStore] = None
+_STORE_LOCK = threading.Lock()
+
+
+def get_recipe_store() -> RecipeStore:
+    """Cache de fiches partagé par le process (ouvert à la première utilisation)."""
+
+    global _STORE
+    with _STORE_LOCK:
+        if _STORE is None:
+            _STORE = RecipeStore()
+        return _STORE
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 
 RECIPE_SCHEMA: Dict[str, Any] = {
@@ -68,3 +68,135 @@ RECIPE_SCHEMA: Dict[str, Any] = {
         "required": ["recipe"],
     },
 }
+
+
+_INGREDIENT_SCHEMA = RECIPE_SCHEMA["schema"]["properties"]["recipe"]["properties"]["ingredients"]["items"]
+_TIMES_SCHEMA = RECIPE_SCHEMA["schema"]["properties"]["recipe"]["properties"]["times"]
+
+# Diff compact d'une fiche: seuls les champs modifiés sont renvoyés par le modèle.
+# Les numéros d'étapes se réfèrent à la fiche d'origine (avant patch).
+RECIPE_PATCH_SCHEMA: Dict[str, Any] = {
+    "name": "recipe_patch",
+    "schema": {
+        "type": "object",
+        "additionalProperties": False,
+        "properties": {
+            "patch": {
+                "type": "object",
+                "additionalProperties": False,
+                "properties": {
+                    "name": {"type": ["string", "null"]},
+                    "servings": {"type": ["integer", "null"], "minimum": 1},
+                    "times": {**_TIMES_SCHEMA, "type": ["object", "null"]},
+                    "ingredients_remove": {"type": "array", "items": {"type": "string"}},
+                    "ingredients_upsert": {"type": "array", "items": _INGREDIENT_SCHEMA},
+                    "steps_remove": {"type": "array", "items": {"type": "integer", "minimum": 1}},
+                    "steps_replace": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "additionalProperties": False,
+                            "properties": {
+                                "index": {"type": "integer", "minimum": 1},
+                                "instruction": {"type": "string"},
+                                "timer_min": {"type": ["integer", "null"], "minimum": 0},
+                            },
+                            "required": ["index", "instruction", "timer_min"],
+                        },
+                    },
+                    "steps_insert": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "additionalProperties": False,
+                            "properties": {
+                                "after": {"type": "integer", "minimum": 0},
+                                "instruction": {"type": "string"},
+                                "timer_min": {"type": ["integer", "null"], "minimum": 0},
+                            },
+                            "required": ["after", "instruction", "timer_min"],
+                        },
+                    },
+                },
+                "required": [
+                    "name",
+                    "servings",
+                    "times",
+                    "ingredients_remove",
+                    "ingredients_upsert",
+                    "steps_remove",
+                    "steps_replace",
+                    "steps_insert",
+                ],
+            }
+        },
+        "required": ["patch"],
+    },
+}
+
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def _matches_type(value: Any, type_name: str) -> bool:
+    if type_name == "integer":
+        return isinstance(value, int) and not isinstance(value, bool)
+    if type_name == "number":
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    expected = _JSON_TYPES.get(type_name)
+    return expected is not None and isinstance(value, expected)
+
+
+def validate_json_schema(data: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Valide `data` contre le sous-ensemble de JSON Schema utilisé dans ce module.
+
+    Mots-clés gérés: type, properties, required, additionalProperties, items, minItems,
+    minimum. Accepte aussi l'enveloppe `{"name": ..., "schema": {...}}` des response_format.
+    Retourne la liste des erreurs (vide si valide).
+    """
+
+    if "schema" in schema and "type" not in schema:
+        schema = schema["schema"]
+
+    errors: List[str] = []
+
+    types = schema.get("type")
+    if types is not None:
+        type_names = types if isinstance(types, list) else [types]
+        if not any(_matches_type(data, name) for name in type_names):
+            return [f"{path}: type attendu {types}, reçu {type(data).__name__}"]
+
+    if isinstance(data, dict):
+        properties = schema.get("properties", {})
+        for key in schema.get("required", []):
+            if key not in data:
+                errors.append(f"{path}: clé requise manquante '{key}'")
+        if schema.get("additionalProperties") is False:
+            for key in data:
+                if key not in properties:
+                    errors.append(f"{path}: clé non autorisée '{key}'")
+        for key, sub_schema in properties.items():
+            if key in data:
+                errors.extend(validate_json_schema(data[key], sub_schema, f"{path}.{key}"))
+
+    elif isinstance(data, list):
+        min_items = schema.get("minItems")
+        if min_items is not None and len(data) < min_items:
+            errors.append(f"{path}: au moins {min_items} élément(s) attendu(s)")
+        items = schema.get("items")
+        if isinstance(items, dict):
+            for index, item in enumerate(data):
+                errors.extend(validate_json_schema(item, items, f"{path}[{index}]"))
+
+    elif _matches_type(data, "number"):
+        minimum = schema.get("minimum")
+        if minimum is not None and data < minimum:
+            errors.append(f"{path}: valeur {data} < minimum {minimum}")
+
+    return errors
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+from pathlib import Path
 from typing import Any, Dict, List, Text
 
 from rasa_sdk import Action, Tracker
 from rasa_sdk.events import EventType, SlotSet
 from rasa_sdk.executor import CollectingDispatcher
 
-from .audio import play_audio_local_async, truthy_env
+from .audio import (
+    PRIORITY_STEP,
+    PRIORITY_URGENT,
+    float_env,
+    play_audio_local_async,
+    stop_audio_playback,
+    truthy_env,
+    tts_public_url,
+)
+from .audio_transforms import clamp_rate, speech_rate_from_slot, time_stretch_file
 from .openai_helpers import call_openai_tts
 
 
@@ -38,17 +48,29 @@ class ActionTextToSpeech(Action):
             # Action technique: avoid user-facing message
             return []
 
+        # Vitesse de parole de la session (slot speech_rate): transformation locale du WAV.
+        speech_rate = speech_rate_from_slot(tracker.get_slot("speech_rate"))
+        audio_path = result["file_path"]
+        if speech_rate != 1.0:
+            try:
+                audio_path = time_stretch_file(audio_path, speech_rate)
+            except Exception:
+                audio_path = result["file_path"]
+
+        # TTS_PREEMPT=false: l'énoncé attend la fin du précédent au lieu de le couper.
         if truthy_env("TTS_PLAY_AUDIO", default=True):
-            play_audio_local_async(result["file_path"])
+            play_audio_local_async(
+                audio_path, priority=PRIORITY_STEP, preempt=truthy_env("TTS_PREEMPT", default=True)
+            )
 
-        # Optional: emit payload to channel if needed
+        # Optional: emit payload to channel if needed (référence courte, pas l'audio lui-même)
         if truthy_env("TTS_EMIT_MESSAGE", default=False):
             payload = {
                 "tts": {
                     "text": result["text"],
                     "mime_type": result["mime_type"],
-                    "audio_base64": result["audio_base64"],
-                    "file_path": result["file_path"],
+                    "url": tts_public_url(audio_path),
+                    "speech_rate": speech_rate,
                     "model": result["model"],
                     "voice": result["voice"],
                 }
@@ -58,6 +80,51 @@ class ActionTextToSpeech(Action):
         return [SlotSet("tts_last_file", result["file_path"])]
 
 
+class ActionSlowDown(Action):
+    """Ralentit la voix: baisse `speech_rate` et rejoue la dernière phrase, sans nouvel appel TTS.
+
+    Optionnel: TTS_SLOW_DOWN_STEP (défaut: 0.15)
+    """
+
+    def name(self) -> Text:
+        return "action_slow_down"
+
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[EventType]:
+
+        step = float_env("TTS_SLOW_DOWN_STEP", 0.15)
+        speech_rate = clamp_rate(speech_rate_from_slot(tracker.get_slot("speech_rate")) - step)
+
+        dispatcher.utter_message(response="utter_slow_confirm")
+
+        last_file = tracker.get_slot("tts_last_file")
+        if isinstance(last_file, str) and last_file and Path(last_file).is_file():
+            try:
+                slowed = time_stretch_file(last_file, speech_rate)
+            except Exception:
+                slowed = None
+            if slowed and truthy_env("TTS_PLAY_AUDIO", default=True):
+                play_audio_local_async(slowed, priority=PRIORITY_URGENT)
+
+            # Même référence que action_text_to_speech: l'UI (navigateur) rejoue la version ralentie.
+            if slowed and truthy_env("TTS_EMIT_MESSAGE", default=False):
+                payload = {
+                    "tts": {
+                        "text": tracker.get_slot("last_step_text") or tracker.get_slot("tts_text"),
+                        "mime_type": "audio/wav",
+                        "url": tts_public_url(slowed),
+                        "speech_rate": speech_rate,
+                    }
+                }
+                dispatcher.utter_message(json_message=payload)
+
+        return [SlotSet("speech_rate", speech_rate)]
+
+
 class ActionUiRefreshPronouncePhrase(Action):
     def name(self) -> Text:
         return "action_ui_refresh_pronounce_phrase"
@@ -76,3 +143,19 @@ class ActionUiRefreshPronouncePhrase(Action):
         }
 
         return [SlotSet("ui_event", ui_event)]
+
+
+class ActionStopAudio(Action):
+    def name(self) -> Text:
+        return "action_stop_audio"
+
+    def run(
+        self,
+        dispatcher: CollectingDispatcher,
+        tracker: Tracker,
+        domain: Dict[Text, Any],
+    ) -> List[EventType]:
+
+        # Barge-in: "pause", "stop"... coupe la lecture locale en cours.
+        stop_audio_playback()
+        return []
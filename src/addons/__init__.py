@@ -0,0 +1,4 @@
+"""Extensions chargées par le serveur Rasa (tracker store, canaux...).
+
+Référencées par chemin de module dans `endpoints.yml` / `credentials.yml`.
+"""
@@ -0,0 +1,219 @@
+"""Canal Rasa en streaming (Server-Sent Events) pour l'UI Streamlit.
+
+Activation dans `credentials.yml`:
+
+    addons.streaming_channel.StreamingInput:
+      watched_slots: [ui_event, tts_last_file, step_index, last_step_text, speech_rate]
+
+`POST /webhooks/stream/webhook` avec `{"sender": ..., "message": ..., "metadata": ...}`
+répond en `text/event-stream` et pousse, au fil du tour:
+  - `message`: chaque message bot (même forme que le canal REST, json_message -> "custom")
+  - `slot`: `{"name", "value"}` pour chaque slot surveillé modifié par une action
+  - `audio`: `{"url", ...}` lisible par le navigateur (route /tts du serveur
+    d'actions): payload `custom["tts"]` dès son envoi, sinon `tts_last_file` en
+    fin de tour (une seule fois par URL)
+  - `done`: fin du tour
+
+Les slots sont lus sur le tracker que Rasa attache au canal après chaque action:
+plus besoin de télécharger le tracker complet via `/conversations/{id}/tracker`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Text
+
+from sanic import Blueprint, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+from rasa.core.channels.channel import (
+    CollectingOutputChannel,
+    InputChannel,
+    UserMessage,
+)
+from rasa.shared.core.events import SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker
+
+from actions.audio import tts_public_url
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCHED_SLOTS = ["ui_event", "tts_last_file", "step_index", "last_step_text", "speech_rate"]
+
+_DONE = object()
+
+
+def sse_frame(event: Text, data: Any) -> Text:
+    payload = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class StreamingOutputChannel(CollectingOutputChannel):
+    """Pousse messages et changements de slots dans une file asyncio."""
+
+    def __init__(self, queue: "asyncio.Queue[Any]", watched_slots: Optional[List[Text]]) -> None:
+        super().__init__()
+        self.queue = queue
+        self.watched_slots = watched_slots
+        self._seen_slots: Dict[Text, Any] = {}
+        self._audio_urls: Set[Text] = set()
+        self._pending_audio: Optional[Dict[Text, Any]] = None
+        self._attached = False
+
+    @classmethod
+    def name(cls) -> Text:
+        return "stream"
+
+    @property
+    def wants_tracker_state(self) -> bool:
+        # On lit les slots directement sur le tracker: pas d'état sérialisé complet.
+        return False
+
+    def attach_tracker_state(self, tracker: DialogueStateTracker) -> None:
+        super().attach_tracker_state(tracker)
+
+        first_attach = not self._attached
+        self._attached = True
+        changed_this_turn = self._slots_set_since_last_user_message(tracker) if first_attach else set()
+
+        names = self.watched_slots if self.watched_slots is not None else list(tracker.slots)
+        for name in names:
+            if name not in tracker.slots:
+                continue
+            value = tracker.get_slot(name)
+            if first_attach and name not in changed_this_turn:
+                # Valeur déjà connue de l'UI (tour précédent): pas de push.
+                self._seen_slots[name] = value
+                continue
+            if name in self._seen_slots and self._seen_slots[name] == value:
+                continue
+
+            self._seen_slots[name] = value
+            self.queue.put_nowait(("slot", {"name": name, "value": value}))
+            if name == "tts_last_file" and isinstance(value, str) and value:
+                # Envoyé en fin de tour seulement si aucun message n'a porté l'audio
+                # (il peut être à une autre vitesse que le fichier source).
+                self._pending_audio = {"url": tts_public_url(value)}
+
+    def _push_audio(self, audio: Dict[Text, Any]) -> None:
+        url = audio.get("url")
+        if not isinstance(url, str) or not url or url in self._audio_urls:
+            return
+        self._audio_urls.add(url)
+        self.queue.put_nowait(("audio", audio))
+
+    def flush_audio(self) -> None:
+        """Pousse l'audio du slot `tts_last_file` si le tour n'en a envoyé aucun."""
+
+        pending, self._pending_audio = self._pending_audio, None
+        if pending is not None and not self._audio_urls:
+            self._push_audio(pending)
+
+    @staticmethod
+    def _slots_set_since_last_user_message(tracker: DialogueStateTracker) -> Set[Text]:
+        names: Set[Text] = set()
+        for event in reversed(tracker.events):
+            if isinstance(event, UserUttered):
+                break
+            if isinstance(event, SlotSet):
+                names.add(event.key)
+        return names
+
+    async def _persist_message(self, message: Dict[Text, Any]) -> None:
+        self.messages.append(message)
+        await self.queue.put(("message", message))
+
+        custom = message.get("custom")
+        if isinstance(custom, dict) and isinstance(custom.get("tts"), dict):
+            self._push_audio(custom["tts"])
+
+
+class StreamingInput(InputChannel):
+    """Canal d'entrée dont la réponse est un flux SSE par tour de conversation."""
+
+    def __init__(self, watched_slots: Optional[Any] = None) -> None:
+        if watched_slots is None:
+            self.watched_slots: Optional[List[Text]] = list(DEFAULT_WATCHED_SLOTS)
+        elif watched_slots == "*":
+            self.watched_slots = None
+        else:
+            self.watched_slots = [str(name) for name in watched_slots]
+
+    @classmethod
+    def name(cls) -> Text:
+        return "stream"
+
+    @classmethod
+    def from_credentials(cls, credentials: Optional[Dict[Text, Any]]) -> InputChannel:
+        credentials = credentials or {}
+        return cls(watched_slots=credentials.get("watched_slots"))
+
+    async def _run_turn(
+        self,
+        on_new_message: Callable[[UserMessage], Awaitable[Any]],
+        message: UserMessage,
+        queue: "asyncio.Queue[Any]",
+    ) -> None:
+        try:
+            await on_new_message(message)
+        except Exception as exc:
+            logger.exception("streaming_channel.turn_failed")
+            await queue.put(("error", {"error": str(exc)}))
+        finally:
+            if isinstance(message.output_channel, StreamingOutputChannel):
+                message.output_channel.flush_audio()
+            await queue.put(_DONE)
+
+    def blueprint(
+        self, on_new_message: Callable[[UserMessage], Awaitable[Any]]
+    ) -> Blueprint:
+        module = inspect.getmodule(self)
+        stream_webhook = Blueprint(
+            f"stream_webhook_{type(self).__name__}",
+            module.__name__ if module else None,
+        )
+
+        @stream_webhook.route("/", methods=["GET"])
+        async def health(request: Request) -> HTTPResponse:
+            return response.json({"status": "ok"})
+
+        @stream_webhook.route("/webhook", methods=["POST"])
+        async def receive(request: Request) -> None:
+            body = request.json or {}
+            sender_id = body.get("sender") or "default"
+            text = body.get("message")
+
+            queue: "asyncio.Queue[Any]" = asyncio.Queue()
+            collector = StreamingOutputChannel(queue, self.watched_slots)
+            message = UserMessage(
+                text,
+                collector,
+                sender_id,
+                input_channel=self.name(),
+                metadata=body.get("metadata"),
+                headers=request.headers,
+            )
+
+            stream = await request.respond(
+                content_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+            task = asyncio.ensure_future(self._run_turn(on_new_message, message, queue))
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is _DONE:
+                        break
+                    event, data = item
+                    await stream.send(sse_frame(event, data))
+                await stream.send(sse_frame("done", {"sender": sender_id}))
+            finally:
+                await task
+                await stream.eof()
+
+        return stream_webhook
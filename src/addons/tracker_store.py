@@ -0,0 +1,466 @@
+"""Tracker store SQLite compact (snapshot + deltas) pour le serveur Rasa.
+
+Activation dans `endpoints.yml`:
+
+    tracker_store:
+      type: addons.tracker_store.CompactSQLiteTrackerStore
+      url: tracker_store.db
+
+Stockage:
+- `conversations`: un snapshot par conversation (liste d'événements compactée)
+- `deltas`: les événements ajoutés depuis le snapshot, un blob par sauvegarde
+
+Les événements sont encodés en JSON compact compressé zlib (1 octet de version
+en tête). Quand une conversation dépasse `compact_after_events`, l'historique
+est réduit à l'état courant (SlotSet/ActiveLoop) + les `keep_turns` derniers
+tours utilisateur: le chargement d'une longue session de cuisine ne rejoue
+plus des milliers d'événements.
+
+Conversations inactives: au-delà de `session_config.session_expiration_time`
+(domaine), l'historique est réduit à l'état courant + le dernier tour
+utilisateur. Le dernier UserUttered garde son horodatage: c'est Rasa qui
+constate l'expiration au message suivant et ouvre la nouvelle session
+(report des slots selon `carry_over_slots_to_new_session`).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Text, Tuple
+
+from rasa.core.brokers.broker import EventBroker
+from rasa.core.tracker_stores.tracker_store import TrackerStore
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import Event
+from rasa.shared.core.trackers import (
+    DialogueStateTracker,
+    get_latest_replay_safe_session_tracker,
+)
+
+
+logger = logging.getLogger(__name__)
+
+_FORMAT_ZLIB_JSON = b"\x01"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    sender_id TEXT PRIMARY KEY,
+    snapshot BLOB NOT NULL,
+    snapshot_events INTEGER NOT NULL,
+    delta_events INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deltas (
+    sender_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (sender_id, seq)
+);
+CREATE INDEX IF NOT EXISTS conversations_updated_at ON conversations (updated_at);
+"""
+
+
+def encode_events(events: List[Dict[Text, Any]]) -> bytes:
+    raw = json.dumps(events, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return _FORMAT_ZLIB_JSON + zlib.compress(raw, 6)
+
+
+def decode_events(blob: bytes) -> List[Dict[Text, Any]]:
+    blob = bytes(blob)
+    if not blob:
+        return []
+    if blob[:1] != _FORMAT_ZLIB_JSON:
+        raise ValueError(f"Format d'événements inconnu: {blob[:1]!r}")
+    return json.loads(zlib.decompress(blob[1:]).decode("utf-8"))
+
+
+def _is_session_start(event: Dict[Text, Any]) -> bool:
+    return event.get("event") == "action" and event.get("name") == "action_session_start"
+
+
+# (nb d'événements rendus, nb d'événements stockés, clé du dernier événement rendu)
+_Reading = Tuple[int, int, Optional[Tuple[Any, Any]]]
+
+
+def _event_key(event: Dict[Text, Any]) -> Tuple[Any, Any]:
+    """Identité d'un événement stocké: type + horodatage (conservé tel quel par le JSON)."""
+
+    return event.get("event"), event.get("timestamp")
+
+
+class CompactSQLiteTrackerStore(TrackerStore):
+    """Tracker store persistant embarqué (SQLite), compacté par snapshot + deltas."""
+
+    def __init__(
+        self,
+        domain: Optional[Domain] = None,
+        event_broker: Optional[EventBroker] = None,
+        host: Optional[Text] = None,
+        db: Text = "tracker_store.db",
+        compact_after_events: int = 300,
+        keep_turns: int = 10,
+        expire_after_min: Optional[float] = None,
+        sweep_every: int = 200,
+        loaded_cache_size: int = 1024,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(domain, event_broker, **kwargs)
+
+        self.db_path = str(host or db)
+        self.compact_after_events = int(compact_after_events)
+        self.keep_turns = int(keep_turns)
+        self._expire_after_min = float(expire_after_min) if expire_after_min is not None else None
+        self.sweep_every = int(sweep_every)
+        self.loaded_cache_size = int(loaded_cache_size)
+
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+        # sender_id -> {"session"/"full"/"saved": (nb d'événements du tracker rendu à Rasa,
+        # nb d'événements stockés, clé du dernier événement rendu)}. Une entrée par type de
+        # lecture: un `retrieve_full_tracker` (API HTTP, UI) entre le `retrieve` d'un tour et
+        # son `save` ne masque pas celle du tour. Borné (LRU): une conversation oubliée est
+        # recalée sur la fin de l'historique stocké à sa prochaine sauvegarde.
+        self._loaded: "OrderedDict[Text, Dict[Text, _Reading]]" = OrderedDict()
+        self._saves_since_sweep = 0
+
+    # ------------------------------------------------------------------
+    # Expiration
+
+    @property
+    def expire_after_s(self) -> Optional[float]:
+        minutes = self._expire_after_min
+        if minutes is None:
+            minutes = float(self.domain.session_config.session_expiration_time)
+        return minutes * 60.0 if minutes and minutes > 0 else None
+
+    def _remember(
+        self, sender_id: Text, kind: Text, tracker: DialogueStateTracker, stored: int, reset: bool = False
+    ) -> None:
+        events = tracker.events
+        last = _event_key(events[-1].as_dict()) if events else None
+        entries = {} if reset else self._loaded.get(sender_id, {})
+        entries[kind] = (len(events), stored, last)
+        self._loaded[sender_id] = entries
+        self._loaded.move_to_end(sender_id)
+        while len(self._loaded) > self.loaded_cache_size:
+            self._loaded.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Accès SQLite (appelés sous self._lock)
+
+    def _read_row(self, sender_id: Text) -> Optional[Tuple[List[Dict[Text, Any]], int, float]]:
+        row = self._conn.execute(
+            "SELECT snapshot, snapshot_events, delta_events, updated_at "
+            "FROM conversations WHERE sender_id = ?",
+            (sender_id,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        snapshot, snapshot_events, delta_events, updated_at = row
+        events = decode_events(snapshot)
+        if delta_events:
+            for (payload,) in self._conn.execute(
+                "SELECT payload FROM deltas WHERE sender_id = ? ORDER BY seq",
+                (sender_id,),
+            ):
+                events.extend(decode_events(payload))
+        return events, snapshot_events + delta_events, updated_at
+
+    def _write_snapshot(self, sender_id: Text, events: List[Dict[Text, Any]], now: float) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute("DELETE FROM deltas WHERE sender_id = ?", (sender_id,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conversations "
+                "(sender_id, snapshot, snapshot_events, delta_events, updated_at) "
+                "VALUES (?, ?, ?, 0, ?)",
+                (sender_id, encode_events(events), len(events), now),
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _append_delta(self, sender_id: Text, events: List[Dict[Text, Any]], now: float) -> None:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.execute(
+                "INSERT INTO deltas (sender_id, seq, payload) VALUES (?, "
+                "(SELECT COALESCE(MAX(seq), 0) + 1 FROM deltas WHERE sender_id = ?), ?)",
+                (sender_id, sender_id, encode_events(events)),
+            )
+            self._conn.execute(
+                "UPDATE conversations SET delta_events = delta_events + ?, updated_at = ? "
+                "WHERE sender_id = ?",
+                (len(events), now, sender_id),
+            )
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _delete_row(self, sender_id: Text) -> None:
+        self._conn.execute("DELETE FROM deltas WHERE sender_id = ?", (sender_id,))
+        self._conn.execute("DELETE FROM conversations WHERE sender_id = ?", (sender_id,))
+        self._loaded.pop(sender_id, None)
+
+    # ------------------------------------------------------------------
+    # Compaction
+
+    def _state_events(
+        self, sender_id: Text, events: List[Dict[Text, Any]], timestamp: float
+    ) -> List[Dict[Text, Any]]:
+        """Événements minimaux qui reproduisent l'état obtenu après `events`."""
+
+        tracker = DialogueStateTracker.from_dict(sender_id, events, self._tracker_slots())
+        state: List[Dict[Text, Any]] = []
+        for slot in tracker.slots.values():
+            if slot.value != slot.initial_value:
+                state.append(
+                    {"event": "slot", "timestamp": timestamp, "name": slot.name, "value": slot.value}
+                )
+
+        active_loop = tracker.active_loop_name
+        if active_loop:
+            state.append({"event": "active_loop", "timestamp": timestamp, "name": active_loop})
+        return state
+
+    def compact_events(
+        self, sender_id: Text, events: List[Dict[Text, Any]], keep_turns: Optional[int] = None
+    ) -> List[Dict[Text, Any]]:
+        """Réduit `events` à: début de session + état au point de coupe + derniers tours."""
+
+        keep_turns = self.keep_turns if keep_turns is None else keep_turns
+
+        user_indices = [i for i, e in enumerate(events) if e.get("event") == "user"]
+        if keep_turns <= 0:
+            cut = len(events)
+        elif len(user_indices) > keep_turns:
+            cut = user_indices[-keep_turns]
+        else:
+            return events
+        if cut == 0:
+            return events
+
+        prefix, tail = events[:cut], events[cut:]
+        timestamp = float(prefix[-1].get("timestamp") or time.time())
+
+        # On garde la dernière frontière de session du préfixe pour que Rasa
+        # retrouve la session courante (action_session_start + session_started).
+        boundary: List[Dict[Text, Any]] = []
+        starts = [i for i, e in enumerate(prefix) if _is_session_start(e)]
+        if starts:
+            start = starts[-1]
+            boundary.append(prefix[start])
+            if start + 1 < len(prefix) and prefix[start + 1].get("event") == "session_started":
+                boundary.append(prefix[start + 1])
+
+        return boundary + self._state_events(sender_id, prefix, timestamp) + tail
+
+    def _compact_idle(self, sender_id: Text) -> None:
+        """Réduit une conversation inactive à son état + son dernier tour utilisateur.
+
+        Le dernier UserUttered est conservé avec son horodatage pour que
+        `is_session_time_expired` reste vrai: Rasa démarre lui-même la session suivante.
+        """
+
+        loaded = self._read_row(sender_id)
+        if loaded is None:
+            return
+        events, stored, _ = loaded
+        compacted = self.compact_events(sender_id, events, keep_turns=1)
+        if len(compacted) < stored:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM deltas WHERE sender_id = ?", (sender_id,))
+                # updated_at inchangé: la conversation n'a pas reçu de nouvel événement.
+                self._conn.execute(
+                    "UPDATE conversations SET snapshot = ?, snapshot_events = ?, delta_events = 0 "
+                    "WHERE sender_id = ?",
+                    (encode_events(compacted), len(compacted), sender_id),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._loaded.pop(sender_id, None)
+
+    def sweep_expired(self) -> int:
+        """Compacte les conversations inactives. Retourne leur nombre."""
+
+        expire_after_s = self.expire_after_s
+        if expire_after_s is None:
+            return 0
+
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT sender_id FROM conversations WHERE updated_at < ? "
+                "AND (snapshot_events + delta_events) > 0",
+                (now - expire_after_s,),
+            ).fetchall()
+            for (sender_id,) in rows:
+                self._compact_idle(sender_id)
+        return len(rows)
+
+    def _known_offset(self, tracker: DialogueStateTracker, stored: int) -> Optional[int]:
+        """Nb d'événements de `tracker` déjà stockés, d'après une lecture mémorisée."""
+
+        events = tracker.events
+        offset = None
+        for returned, known_stored, last in self._loaded.get(tracker.sender_id, {}).values():
+            if known_stored != stored or returned > len(events):
+                continue
+            if returned and _event_key(events[returned - 1].as_dict()) != last:
+                continue
+            offset = max(offset or 0, returned)
+        return offset
+
+    def _offset_from_store(self, tracker: DialogueStateTracker) -> Optional[int]:
+        """Recale `tracker` sur le dernier événement stocké (lecture non mémorisée)."""
+
+        loaded = self._read_row(tracker.sender_id)
+        if loaded is None or not loaded[0]:
+            return None
+        last = _event_key(loaded[0][-1])
+        events = list(tracker.events)
+        for index in range(len(events) - 1, -1, -1):
+            if _event_key(events[index].as_dict()) == last:
+                return index + 1
+        return None
+
+    # ------------------------------------------------------------------
+    # API TrackerStore
+
+    async def save(self, tracker: DialogueStateTracker) -> None:
+        """Ajoute les nouveaux événements en delta (ou réécrit un snapshot compacté)."""
+
+        sender_id = tracker.sender_id
+        now = time.time()
+        tracker.ensure_conversation_started_timestamp()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT snapshot_events + delta_events FROM conversations WHERE sender_id = ?",
+                (sender_id,),
+            ).fetchone()
+            stored = row[0] if row else 0
+
+            rewrite = False
+            if row is None:
+                new_from = 0
+            else:
+                # Un tracker de session ne contient pas les sessions précédentes: on
+                # n'ajoute que ce qui suit le dernier événement stocké, jamais de réécriture
+                # à partir d'un historique partiel.
+                offset = self._known_offset(tracker, stored)
+                if offset is None:
+                    offset = self._offset_from_store(tracker)
+                if offset is None:
+                    # Tracker sans aucun événement commun avec ce store: il le remplace.
+                    logger.warning(f"Tracker '{sender_id}' sans lien avec l'historique stocké: réécriture.")
+                    rewrite = True
+                    offset = 0
+                new_from = offset
+
+            new_events: List[Event] = list(tracker.events)[new_from:]
+
+        await self.stream_events(tracker, new_events=new_events)
+
+        with self._lock:
+            if not new_events and not rewrite and row is not None:
+                return
+
+            new_dicts = [e.as_dict() for e in new_events]
+            total = (0 if rewrite or row is None else stored) + len(new_dicts)
+
+            if row is None or rewrite or total > self.compact_after_events:
+                if row is not None and not rewrite:
+                    loaded = self._read_row(sender_id)
+                    events = (loaded[0] if loaded else []) + new_dicts
+                else:
+                    events = new_dicts
+                if len(events) > self.compact_after_events:
+                    events = self.compact_events(sender_id, events)
+                self._write_snapshot(sender_id, events, now)
+                total = len(events)
+                # Le tracker en mémoire garde son historique complet: une sauvegarde
+                # suivante avec le même objet repart de sa longueur actuelle.
+            else:
+                self._append_delta(sender_id, new_dicts, now)
+
+            self._remember(sender_id, "saved", tracker, total, reset=True)
+
+            self._saves_since_sweep += 1
+            sweep = self.sweep_every > 0 and self._saves_since_sweep >= self.sweep_every
+            if sweep:
+                self._saves_since_sweep = 0
+
+        if sweep:
+            self.sweep_expired()
+
+    async def _retrieve(
+        self, sender_id: Text, fetch_all_sessions: bool
+    ) -> Optional[DialogueStateTracker]:
+        with self._lock:
+            loaded = self._read_row(sender_id)
+            if loaded is None:
+                self._loaded.pop(sender_id, None)
+                return None
+            events, stored, _ = loaded
+
+        tracker = DialogueStateTracker.from_dict(sender_id, events, self._tracker_slots())
+        if not fetch_all_sessions:
+            tracker = get_latest_replay_safe_session_tracker(
+                tracker,
+                start_session_after_expiry=self.domain.session_config.start_session_after_expiry,
+            )
+
+        with self._lock:
+            self._remember(sender_id, "full" if fetch_all_sessions else "session", tracker, stored)
+        return tracker
+
+    async def retrieve(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        return await self._retrieve(sender_id, fetch_all_sessions=False)
+
+    async def retrieve_full_tracker(self, sender_id: Text) -> Optional[DialogueStateTracker]:
+        return await self._retrieve(sender_id, fetch_all_sessions=True)
+
+    async def exists(self, conversation_id: Text) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM conversations WHERE sender_id = ?", (conversation_id,)
+            ).fetchone()
+        return row is not None
+
+    async def update(
+        self, tracker: DialogueStateTracker, apply_deletion_only: bool = True
+    ) -> None:
+        with self._lock:
+            self._write_snapshot(
+                tracker.sender_id, [e.as_dict() for e in tracker.events], time.time()
+            )
+            self._remember(tracker.sender_id, "saved", tracker, len(tracker.events), reset=True)
+
+    async def delete(self, sender_id: Text) -> None:
+        with self._lock:
+            self._delete_row(sender_id)
+
+    async def keys(self) -> Iterable[Text]:
+        with self._lock:
+            rows = self._conn.execute("SELECT sender_id FROM conversations").fetchall()
+        return [sender_id for (sender_id,) in rows]
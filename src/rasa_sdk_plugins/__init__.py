@@ -0,0 +1,16 @@
+"""Plugins du serveur d'actions (`rasa run actions`).
+
+rasa_sdk importe ce package au démarrage s'il est importable (lancer depuis `src/`)
+et appelle `init_hooks` pour enregistrer les extensions Sanic (`/tts`, `/ready`).
+"""
+
+from __future__ import annotations
+
+import pluggy
+
+from . import audio_files, warmup
+
+
+def init_hooks(manager: pluggy.PluginManager) -> None:
+    manager.register(audio_files)
+    manager.register(warmup)
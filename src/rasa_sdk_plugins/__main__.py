@@ -0,0 +1,5 @@
+"""`python -m rasa_sdk_plugins`: durée d'import à froid du paquet d'actions et de ses dépendances."""
+
+from .warmup import main
+
+raise SystemExit(main())
@@ -0,0 +1,131 @@
+"""Service des fichiers audio TTS par référence: `GET|HEAD /tts/<nom>` sur le serveur d'actions.
+
+- fichiers lus dans TTS_OUTPUT_DIR (défaut: tts_outputs), nom de fichier seul
+- ETag / If-None-Match (304), Last-Modified
+- requêtes Range (`bytes=a-b`, `bytes=a-`, `bytes=-n`) -> 206 / 416
+- Cache-Control long: les noms de fichiers ne sont jamais réutilisés
+
+Le corps est envoyé depuis un mmap du fichier (tranches memoryview, sans buffer de
+lecture intermédiaire); l'API de streaming Sanic n'expose pas `sendfile`.
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import mmap
+import os
+import re
+from email.utils import formatdate
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pluggy
+from sanic import Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+
+ROUTE_PREFIX = "/tts"
+CHUNK_SIZE = 256 * 1024
+
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_.-]+$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _output_dir() -> Path:
+    return Path(os.getenv("TTS_OUTPUT_DIR", "tts_outputs")).resolve()
+
+
+def _resolve(name: str) -> Optional[Path]:
+    if not _SAFE_NAME.match(name) or name.startswith("."):
+        return None
+    path = _output_dir() / name
+    return path if path.is_file() else None
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Retourne (début, fin incluse) ou None si la plage est invalide."""
+
+    match = _RANGE.match(header.strip())
+    if not match or size == 0:
+        return None
+    start_s, end_s = match.groups()
+    if not start_s and not end_s:
+        return None
+    if not start_s:
+        length = int(end_s)
+        if length == 0:
+            return None
+        return max(size - length, 0), size - 1
+    start = int(start_s)
+    end = min(int(end_s), size - 1) if end_s else size - 1
+    if start > end:
+        return None
+    return start, end
+
+
+async def serve_tts_file(request: Request, name: str) -> Optional[HTTPResponse]:
+    path = _resolve(name)
+    if path is None:
+        return response.json({"error": "not found"}, status=404)
+
+    stat = path.stat()
+    size = stat.st_size
+    etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+    mime_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if path.suffix.lower() == ".wav":
+        mime_type = "audio/wav"
+
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return response.empty(status=304, headers=headers)
+
+    start, end, status = 0, size - 1, 200
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        parsed = _parse_range(range_header, size)
+        if parsed is None:
+            headers["Content-Range"] = f"bytes */{size}"
+            return response.empty(status=416, headers=headers)
+        start, end = parsed
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    length = end - start + 1 if size else 0
+    headers["Content-Length"] = str(length)
+
+    if request.method == "HEAD" or length == 0:
+        return response.raw(b"", status=status, headers=headers, content_type=mime_type)
+
+    stream = await request.respond(status=status, headers=headers, content_type=mime_type)
+    with path.open("rb") as handle, mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            offset = start
+            while offset <= end:
+                chunk_end = min(offset + CHUNK_SIZE, end + 1)
+                await stream.send(view[offset:chunk_end])
+                offset = chunk_end
+        finally:
+            view.release()
+    await stream.eof()
+    return None
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    app.add_route(
+        serve_tts_file,
+        f"{ROUTE_PREFIX}/<name:str>",
+        methods=["GET", "HEAD"],
+        name="tts_file",
+    )
@@ -0,0 +1,210 @@
+"""Préchauffage du serveur d'actions et endpoint de disponibilité `GET /ready`.
+
+Au démarrage de chaque worker, les étapes de ACTIONS_WARMUP sont exécutées en
+arrière-plan; `/ready` répond 503 tant qu'elles ne sont pas terminées, puis 200
+(avec la durée de chaque étape). `/health` (rasa_sdk) reste un simple ping.
+
+ACTIONS_WARMUP (défaut: "imports,openai,caches"), liste séparée par des virgules:
+  - imports: modules d'actions + dépendances chargées à la demande (openai, numpy)
+  - openai: client partagé + première connexion (DNS/TLS) ouverte dans son pool
+  - caches: RecipeStore, index des candidates, index du glossaire
+  - tts: synthèse (mise en cache) des phrases statiques: ACTIONS_WARMUP_PHRASES
+    (séparées par "|"), sinon les réponses sans variable de ACTIONS_WARMUP_DOMAIN
+    (défaut: domain.yml)
+  - "none": prêt immédiatement
+
+Mesure des imports à froid (depuis `src/`; sanic est déjà chargé par les plugins
+eux-mêmes; le paquet `actions` est compté d'un bloc, modules importés par
+`actions/__init__.py` compris):
+    python -m rasa_sdk_plugins
+"""
+
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import logging
+import os
+import pkgutil
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import pluggy
+from sanic import Sanic, response
+from sanic.request import Request
+from sanic.response import HTTPResponse
+
+
+hookimpl = pluggy.HookimplMarker("rasa_sdk")
+logger = logging.getLogger(__name__)
+
+DEFAULT_STEPS = "imports,openai,caches"
+_LAZY_DEPENDENCIES = ["openai", "numpy"]
+
+_STATE: Dict[str, Any] = {"status": "starting", "steps": {}, "imports_ms": {}}
+_STATE_LOCK = threading.Lock()
+
+
+def _module_names() -> List[str]:
+    # `actions/__init__.py` importe toutes les actions: le paquet est mesuré d'un bloc,
+    # puis les modules qu'il ne charge pas (scripts, utilitaires).
+    spec = importlib.util.find_spec("actions")
+    if spec is None or not spec.submodule_search_locations:
+        raise RuntimeError("Paquet `actions` introuvable (lancer depuis `src/`).")
+
+    names = sorted(f"actions.{info.name}" for info in pkgutil.iter_modules(spec.submodule_search_locations))
+    return ["rasa_sdk", "actions", *names, *_LAZY_DEPENDENCIES]
+
+
+def timed_imports(names: Optional[List[str]] = None) -> Dict[str, Optional[float]]:
+    """Importe les modules dans l'ordre et retourne la durée d'import de chacun en ms.
+
+    0 si le module était déjà chargé, None s'il n'est pas installé.
+    """
+
+    timings: Dict[str, Optional[float]] = {}
+    for name in names if names is not None else _module_names():
+        if name in sys.modules:
+            timings[name] = 0.0
+            continue
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            timings[name] = None
+            continue
+        timings[name] = round((time.perf_counter() - started) * 1000.0, 1)
+    return timings
+
+
+def _warm_imports() -> None:
+    timings = timed_imports()
+    with _STATE_LOCK:
+        _STATE["imports_ms"] = timings
+
+
+def _warm_openai() -> None:
+    import openai
+
+    from actions.openai_helpers import openai_client
+
+    client = openai_client()
+    # N'importe quelle requête légère ouvre la connexion; une réponse d'erreur de l'API
+    # (clé refusée, endpoint absent) suffit, seuls les échecs réseau comptent.
+    try:
+        client.with_options(timeout=10.0, max_retries=0).models.list()
+    except (openai.APIConnectionError, openai.APITimeoutError):
+        raise
+    except openai.APIError:
+        pass
+
+
+def _warm_caches() -> None:
+    from actions.inventory import get_candidate_search
+    from actions.qa_index import get_glossary_qa
+
+    get_candidate_search().index.refresh()
+    get_glossary_qa()
+
+
+def _static_phrases() -> List[str]:
+    raw = os.getenv("ACTIONS_WARMUP_PHRASES")
+    if raw:
+        return [phrase.strip() for phrase in raw.split("|") if phrase.strip()]
+
+    from ruamel.yaml import YAML
+
+    path = os.getenv("ACTIONS_WARMUP_DOMAIN", "domain.yml")
+    with open(path, encoding="utf-8") as handle:
+        domain = YAML(typ="safe").load(handle) or {}
+
+    phrases = []
+    for variants in (domain.get("responses") or {}).values():
+        for variant in variants or []:
+            text = variant.get("text") if isinstance(variant, dict) else None
+            if isinstance(text, str) and text.strip() and "{" not in text:
+                phrases.append(text.strip())
+    return phrases
+
+
+def _warm_tts() -> None:
+    from actions.audio import truthy_env
+    from actions.openai_helpers import call_openai_tts
+
+    if not truthy_env("TTS_CACHE", default=True):
+        raise RuntimeError("TTS_CACHE est désactivé: rien à préchauffer.")
+    for phrase in _static_phrases():
+        call_openai_tts(phrase)
+
+
+_STEPS: Dict[str, Callable[[], None]] = {
+    "imports": _warm_imports,
+    "openai": _warm_openai,
+    "caches": _warm_caches,
+    "tts": _warm_tts,
+}
+
+
+def run_warmup(steps: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Exécute les étapes dans l'ordre; une étape en échec est notée sans bloquer la disponibilité."""
+
+    if steps is None:
+        raw = os.getenv("ACTIONS_WARMUP", DEFAULT_STEPS)
+        steps = [] if raw.strip().lower() == "none" else [s.strip() for s in raw.split(",") if s.strip()]
+
+    with _STATE_LOCK:
+        _STATE["status"] = "warming"
+
+    started = time.perf_counter()
+    for name in steps:
+        step = _STEPS.get(name)
+        step_started = time.perf_counter()
+        result: Dict[str, Any] = {}
+        if step is None:
+            result["error"] = "étape inconnue"
+        else:
+            try:
+                step()
+            except Exception as exc:
+                result["error"] = f"{type(exc).__name__}: {exc}"
+        result["ms"] = round((time.perf_counter() - step_started) * 1000.0, 1)
+        with _STATE_LOCK:
+            _STATE["steps"][name] = result
+        logger.info(f"Warm-up '{name}': {result}")
+
+    with _STATE_LOCK:
+        _STATE["status"] = "ready"
+        _STATE["total_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+        return dict(_STATE)
+
+
+def warmup_state() -> Dict[str, Any]:
+    with _STATE_LOCK:
+        return {**_STATE, "steps": dict(_STATE["steps"])}
+
+
+async def ready(request: Request) -> HTTPResponse:
+    state = warmup_state()
+    return response.json(state, status=200 if state["status"] == "ready" else 503)
+
+
+async def _start_warmup(app: Sanic) -> None:
+    threading.Thread(target=run_warmup, name="actions-warmup", daemon=True).start()
+
+
+@hookimpl
+def attach_sanic_app_extensions(app: Sanic) -> None:
+    app.add_route(ready, "/ready", methods=["GET"], name="ready")
+    app.register_listener(_start_warmup, "after_server_start")
+
+
+def main() -> int:
+    timings = timed_imports()
+    for name, ms in sorted(timings.items(), key=lambda item: -(item[1] or 0.0)):
+        label = "absent" if ms is None else f"{ms:8.1f} ms"
+        print(f"{label:>12}  {name}")
+    loaded = [ms for ms in timings.values() if ms]
+    print(f"{sum(loaded):8.1f} ms au total", flush=True)
+    return 0
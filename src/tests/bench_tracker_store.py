@@ -0,0 +1,108 @@
+"""Benchmark: latence load/save du tracker store SQLite compact vs InMemoryTrackerStore.
+
+Simule des sessions de cuisine longues (tours utilisateur + actions + slots) et
+mesure, pour chaque store:
+  - save: sauvegarde incrémentale après chaque tour
+  - load: `retrieve` de la conversation complète
+
+Usage (depuis `src/`, avec Rasa installé):
+    python tests/bench_tracker_store.py --turns 50 200 800
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rasa.core.tracker_stores.tracker_store import InMemoryTrackerStore, TrackerStore  # noqa: E402
+from rasa.shared.core.domain import Domain  # noqa: E402
+from rasa.shared.core.events import (  # noqa: E402
+    ActionExecuted,
+    BotUttered,
+    SessionStarted,
+    SlotSet,
+    UserUttered,
+)
+
+from addons.tracker_store import CompactSQLiteTrackerStore  # noqa: E402
+
+
+_UTTERANCES = ["next", "repeat", "next step", "pause", "resume", "slower"]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _run_session(store: TrackerStore, sender_id: str, turns: int) -> Dict[str, List[float]]:
+    tracker = await store.get_or_create_tracker(sender_id)
+    tracker.update(ActionExecuted("action_session_start"))
+    tracker.update(SessionStarted())
+    tracker.update(ActionExecuted("action_listen"))
+    await store.save(tracker)
+
+    save_ms: List[float] = []
+    for turn in range(turns):
+        tracker = await store.retrieve(sender_id)
+        text = _UTTERANCES[turn % len(_UTTERANCES)]
+        tracker.update(UserUttered(text, intent={"name": "next_step", "confidence": 1.0}))
+        tracker.update(ActionExecuted("action_tell_recipe_step"))
+        tracker.update(BotUttered(f"Étape {turn + 1}: mélanger pendant 2 minutes."))
+        tracker.update(SlotSet("step_index", float(turn + 1)))
+        tracker.update(SlotSet("last_step_text", f"Étape {turn + 1}"))
+        tracker.update(ActionExecuted("action_listen"))
+
+        start = time.perf_counter()
+        await store.save(tracker)
+        save_ms.append((time.perf_counter() - start) * 1000.0)
+
+    load_ms: List[float] = []
+    for _ in range(20):
+        start = time.perf_counter()
+        await store.retrieve(sender_id)
+        load_ms.append((time.perf_counter() - start) * 1000.0)
+
+    return {"save": save_ms, "load": load_ms}
+
+
+async def _bench(turns_list: List[int]) -> None:
+    domain = Domain.load("domain.yml") if os.path.exists("domain.yml") else Domain.empty()
+    tmp_dir = tempfile.mkdtemp(prefix="bench_tracker_")
+
+    print(f"{'store':<28}{'turns':>7}{'save p50':>10}{'save p99':>10}{'load p50':>10}{'load p99':>10}  (ms)")
+    for turns in turns_list:
+        stores = {
+            "InMemoryTrackerStore": InMemoryTrackerStore(domain),
+            "CompactSQLiteTrackerStore": CompactSQLiteTrackerStore(
+                domain, db=os.path.join(tmp_dir, f"bench_{turns}.db")
+            ),
+        }
+        for name, store in stores.items():
+            result = await _run_session(store, f"bench_{turns}", turns)
+            print(
+                f"{name:<28}{turns:>7}"
+                f"{statistics.median(result['save']):>10.2f}{_percentile(result['save'], 99):>10.2f}"
+                f"{statistics.median(result['load']):>10.2f}{_percentile(result['load'], 99):>10.2f}"
+            )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, nargs="+", default=[50, 200, 800])
+    args = parser.parse_args()
+    asyncio.run(_bench(args.turns))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+"""Faux serveur OpenAI local pour les tests de charge (aucun appel réseau, aucun coût).
+
+Répond à:
+  - POST /v1/chat/completions: fiche recette conforme à RECIPE_SCHEMA, patch vide
+    (mode patch) ou réponse texte courte (questions)
+  - POST /v1/audio/speech: WAV de silence, durée proportionnelle au texte
+
+Chaque réponse attend une latence tirée d'une loi log-normale (médiane et sigma par
+endpoint), pour reproduire la queue de distribution d'une vraie API.
+
+Usage (depuis `src/`):
+    python tests/fake_openai_server.py --port 8765 --chat-median-ms 1800 --tts-median-ms 600
+puis lancer Rasa et l'action server avec:
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://localhost:8765/v1
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import random
+import threading
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict
+
+
+_SAMPLE_RATE = 24000
+
+
+def _lognormal_s(median_ms: float, sigma: float) -> float:
+    return random.lognormvariate(math.log(max(median_ms, 1.0)), sigma) / 1000.0
+
+
+def fake_recipe_card(name: str = "Omelette aux légumes") -> Dict[str, Any]:
+    return {
+        "recipe": {
+            "name": name,
+            "servings": 2,
+            "times": {"total_min": 20, "prep_min": 10, "cook_min": 10},
+            "ingredients": [
+                {"name": "oeufs", "quantity": 4, "unit": None, "critical": True, "alternative": None},
+                {"name": "tomates", "quantity": 2, "unit": None, "critical": False, "alternative": "poivron"},
+                {"name": "beurre", "quantity": 10, "unit": "g", "critical": False, "alternative": "huile d'olive"},
+            ],
+            "steps": [
+                {"index": 1, "instruction": "Couper les tomates en dés.", "timer_min": None},
+                {"index": 2, "instruction": "Battre les oeufs avec une pincée de sel.", "timer_min": None},
+                {"index": 3, "instruction": "Faire fondre le beurre à feu moyen.", "timer_min": 1},
+                {"index": 4, "instruction": "Verser les oeufs, ajouter les tomates et cuire.", "timer_min": 5},
+                {"index": 5, "instruction": "Plier l'omelette et servir chaud.", "timer_min": None},
+            ],
+        }
+    }
+
+
+_EMPTY_PATCH = {
+    "patch": {
+        "name": None,
+        "servings": None,
+        "times": None,
+        "ingredients_remove": [],
+        "ingredients_upsert": [],
+        "steps_remove": [],
+        "steps_replace": [],
+        "steps_insert": [],
+    }
+}
+
+
+def silence_wav(seconds: float) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(_SAMPLE_RATE)
+        wav.writeframes(b"\x00\x00" * int(_SAMPLE_RATE * seconds))
+    return buffer.getvalue()
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    server: "FakeOpenAIServer"
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "invalid JSON"}})
+            return
+
+        path = self.path.split("?", 1)[0].rstrip("/")
+        config = self.server.config
+        if random.random() < config["error_rate"]:
+            time.sleep(_lognormal_s(config["chat_median_ms"] / 4, config["sigma"]))
+            self._send_json(503, {"error": {"message": "fake overload", "type": "server_error"}})
+            return
+
+        if path.endswith("/chat/completions"):
+            time.sleep(_lognormal_s(config["chat_median_ms"], config["sigma"]))
+            self._send_json(200, self._chat_completion(body))
+        elif path.endswith("/audio/speech"):
+            text = str(body.get("input") or "")
+            time.sleep(_lognormal_s(config["tts_median_ms"], config["sigma"]))
+            # ~15 caractères par seconde de parole.
+            self._send(200, silence_wav(max(0.3, len(text) / 15.0)), "audio/wav")
+        else:
+            self._send_json(404, {"error": {"message": f"unknown endpoint {path}"}})
+
+        with self.server.lock:
+            self.server.requests[path] = self.server.requests.get(path, 0) + 1
+
+    def _chat_completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        messages = body.get("messages") or []
+        prompt = "\n".join(str(m.get("content") or "") for m in messages)
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps(_EMPTY_PATCH if '"patch"' in prompt else fake_recipe_card(), ensure_ascii=False)
+        else:
+            content = "C'est une technique de cuisine courante: procède à feu moyen et goûte régulièrement."
+
+        return {
+            "id": f"chatcmpl-fake-{random.getrandbits(48):x}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or "fake",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, chat_median_ms: float, tts_median_ms: float,
+                 sigma: float = 0.5, error_rate: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", port), FakeOpenAIHandler)
+        self.config = {
+            "chat_median_ms": chat_median_ms,
+            "tts_median_ms": tts_median_ms,
+            "sigma": sigma,
+            "error_rate": error_rate,
+        }
+        self.lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start_background(self) -> "FakeOpenAIServer":
+        threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chat-median-ms", type=float, default=1800.0)
+    parser.add_argument("--tts-median-ms", type=float, default=600.0)
+    parser.add_argument("--sigma", type=float, default=0.5, help="écart-type log-normal (queue de latence)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="part de réponses 503")
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer(args.port, args.chat_median_ms, args.tts_median_ms, args.sigma, args.error_rate)
+    print(f"Faux OpenAI sur {server.base_url} (Ctrl+C pour arrêter)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Requêtes servies: {server.requests}", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
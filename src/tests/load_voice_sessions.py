@@ -0,0 +1,307 @@
+"""Test de charge: sessions de cuisine concurrentes rejouées sur le webhook REST de Rasa.
+
+Les scripts de conversation sont construits depuis `data/nlu.yml` (exemples par
+intent) et `data/cook_from_fridge.yml` (ordre des étapes du flow): salutation,
+ingrédients, choix de la recette, puis pas-à-pas avec next/repeat/pause/resume.
+
+Pour chaque niveau de concurrence (nombre max de sessions simultanées), le
+générateur lance des sessions:
+  - --rate R > 0: boucle ouverte, arrivées de Poisson à R sessions/s sur leur
+    propre horloge; une arrivée qui trouve tous les créneaux occupés est rejetée
+    et comptée (jamais mise en attente: pas d'omission coordonnée)
+  - --rate 0: boucle fermée, une nouvelle session dès qu'une se termine
+et rapporte:
+  - débit (tours/s), latence par tour p50/p99, taux d'erreur
+  - arrivées et part d'arrivées rejetées (boucle ouverte)
+  - saturation: occupation moyenne des sessions actives et latence p99 de
+    `/health` de l'action server (sondé en continu)
+
+Usage (depuis `src/`), avec le faux OpenAI pour ne rien payer:
+    python tests/fake_openai_server.py --port 8765 &
+    OPENAI_API_KEY=fake OPENAI_BASE_URL=http://localhost:8765/v1 TTS_PLAY_AUDIO=false rasa run actions &
+    rasa run --enable-api &
+    python tests/load_voice_sessions.py --concurrency 1 2 4 8 16 --duration 60
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import requests
+from ruamel.yaml import YAML
+
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+
+_ENTITY = re.compile(r"\[([^\]]+)\]\([^)]+\)")
+
+# Slot collecté par le flow -> intents qui le remplissent (et intent de fin de saisie).
+_COLLECT_INTENTS = {
+    "ingredients": ("add_ingredient", "done_ingredients"),
+    "selected_recipe_index": ("choose_recipe", None),
+}
+_STEP_INTENTS = ["next_step", "next_step", "next_step", "repeat_step", "pause_recipe", "slow_down"]
+
+
+def _load_yaml(path: Path) -> Any:
+    return YAML(typ="safe").load(path.read_text(encoding="utf-8")) or {}
+
+
+def load_nlu_examples(path: Path) -> Dict[str, List[str]]:
+    data = _load_yaml(path)
+    examples: Dict[str, List[str]] = {}
+    for block in data.get("nlu") or []:
+        intent = block.get("intent")
+        if not intent:
+            continue
+        for line in str(block.get("examples") or "").splitlines():
+            text = line.strip()
+            if text.startswith("- "):
+                examples.setdefault(intent, []).append(_ENTITY.sub(r"\1", text[2:].strip()))
+    return examples
+
+
+def load_flow_collects(path: Path) -> List[str]:
+    data = _load_yaml(path)
+    collects: List[str] = []
+    for flow in (data.get("flows") or {}).values():
+        for step in flow.get("steps") or []:
+            if isinstance(step, dict) and step.get("collect"):
+                collects.append(step["collect"])
+    return collects
+
+
+def build_script(
+    examples: Dict[str, List[str]], collects: List[str], rng: random.Random, steps: int
+) -> List[str]:
+    def say(intent: str) -> Optional[str]:
+        choices = examples.get(intent)
+        return rng.choice(choices) if choices else None
+
+    script = [say("greet"), say("start_fridge_mode")]
+    for slot in collects:
+        intent, done_intent = _COLLECT_INTENTS.get(slot, (None, None))
+        if intent is None:
+            continue
+        repeats = rng.randint(2, 4) if done_intent else 1
+        script += [say(intent) for _ in range(repeats)]
+        if done_intent:
+            script.append(say(done_intent))
+
+    script.append(say("start_step_by_step"))
+    paused = False
+    for _ in range(steps):
+        intent = "resume_recipe" if paused else rng.choice(_STEP_INTENTS)
+        paused = intent == "pause_recipe"
+        script.append(say(intent))
+    script.append(say("goodbye"))
+    return [text for text in script if text]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class LevelStats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.sessions = 0
+        self.arrivals = 0
+        self.rejected = 0
+        self.active = 0
+        self.active_samples: List[int] = []
+        self.health_ms: List[float] = []
+        self.health_errors = 0
+
+    def record_turn(self, latency_s: float, ok: bool) -> None:
+        with self.lock:
+            self.latencies.append(latency_s)
+            if not ok:
+                self.errors += 1
+
+
+def run_session(
+    rasa_url: str, script: List[str], stats: LevelStats, think_s: float, timeout_s: float, stop_at: float
+) -> None:
+    sender = f"load-{random.getrandbits(40):x}"
+    with requests.Session() as http:
+        for text in script:
+            if time.monotonic() >= stop_at:
+                break
+            started = time.perf_counter()
+            ok = False
+            try:
+                resp = http.post(
+                    f"{rasa_url}/webhooks/rest/webhook",
+                    json={"sender": sender, "message": text},
+                    timeout=timeout_s,
+                )
+                ok = resp.status_code == 200 and isinstance(resp.json(), list)
+            except (requests.RequestException, ValueError):
+                ok = False
+            stats.record_turn(time.perf_counter() - started, ok)
+            if think_s > 0:
+                time.sleep(random.expovariate(1.0 / think_s))
+    with stats.lock:
+        stats.sessions += 1
+
+
+def _probe(actions_url: str, stats: LevelStats, stop: threading.Event) -> None:
+    with requests.Session() as http:
+        while not stop.wait(0.2):
+            with stats.lock:
+                stats.active_samples.append(stats.active)
+            if not actions_url:
+                continue
+            started = time.perf_counter()
+            try:
+                ok = http.get(f"{actions_url}/health", timeout=5).status_code == 200
+            except requests.RequestException:
+                ok = False
+            with stats.lock:
+                if ok:
+                    stats.health_ms.append((time.perf_counter() - started) * 1000.0)
+                else:
+                    stats.health_errors += 1
+
+
+def run_level(
+    args: argparse.Namespace,
+    concurrency: int,
+    examples: Dict[str, List[str]],
+    collects: List[str],
+    rng: random.Random,
+) -> Dict[str, Any]:
+    stats = LevelStats()
+    stop = threading.Event()
+    probe = threading.Thread(target=_probe, args=(args.actions_url, stats, stop), daemon=True)
+    probe.start()
+
+    slots = threading.Semaphore(concurrency)
+    started = time.monotonic()
+    stop_at = started + args.duration
+
+    def session() -> None:
+        try:
+            with stats.lock:
+                stats.active += 1
+            script = build_script(examples, collects, random.Random(rng.random()), args.steps)
+            run_session(args.rasa_url, script, stats, args.think, args.timeout, stop_at)
+        finally:
+            with stats.lock:
+                stats.active -= 1
+            slots.release()
+
+    def admit() -> bool:
+        with stats.lock:
+            stats.arrivals += 1
+        if slots.acquire(blocking=False):
+            pool.submit(session)
+            return True
+        with stats.lock:
+            stats.rejected += 1
+        return False
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if args.rate > 0:
+            # Boucle ouverte: les instants d'arrivée sont tirés à l'avance sur l'horloge
+            # du test; une session lente ne retarde jamais l'arrivée suivante.
+            next_arrival = started
+            while True:
+                next_arrival += rng.expovariate(args.rate)
+                if next_arrival >= stop_at:
+                    break
+                time.sleep(max(0.0, next_arrival - time.monotonic()))
+                admit()
+        else:
+            # Boucle fermée: une nouvelle session dès qu'un créneau se libère.
+            while time.monotonic() < stop_at:
+                if not slots.acquire(timeout=max(0.0, stop_at - time.monotonic())):
+                    break
+                slots.release()
+                if time.monotonic() >= stop_at:
+                    break
+                admit()
+
+    stop.set()
+    probe.join()
+    elapsed = time.monotonic() - started
+
+    turns = len(stats.latencies)
+    return {
+        "concurrency": concurrency,
+        "sessions": stats.sessions,
+        "arrivals": stats.arrivals,
+        "rejected_rate": stats.rejected / stats.arrivals if stats.arrivals else 0.0,
+        "turns": turns,
+        "throughput_tps": turns / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(stats.latencies, 50) * 1000.0,
+        "p99_ms": _percentile(stats.latencies, 99) * 1000.0,
+        "error_rate": stats.errors / turns if turns else 0.0,
+        "occupancy": (statistics.mean(stats.active_samples) / concurrency) if stats.active_samples else 0.0,
+        "health_p99_ms": _percentile(stats.health_ms, 99),
+        "health_errors": stats.health_errors,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rasa-url", default=os.getenv("RASA_URL", "http://localhost:5005"))
+    parser.add_argument("--actions-url", default=os.getenv("ACTIONS_URL", "http://localhost:5055"),
+                        help="action server sondé pour la saturation ('' pour désactiver)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--duration", type=float, default=60.0, help="durée par niveau (s)")
+    parser.add_argument("--rate", type=float, default=0.0,
+                        help="arrivées de Poisson, sessions/s (boucle ouverte); 0 = boucle fermée")
+    parser.add_argument("--think", type=float, default=0.0, help="temps de réflexion moyen entre tours (s)")
+    parser.add_argument("--steps", type=int, default=8, help="tours pas-à-pas par session")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", default=None, help="écrit les résultats dans ce fichier")
+    args = parser.parse_args()
+
+    examples = load_nlu_examples(SRC_DIR / "data" / "nlu.yml")
+    collects = load_flow_collects(SRC_DIR / "data" / "cook_from_fridge.yml")
+    rng = random.Random(args.seed)
+
+    header = (
+        f"{'conc':>5} {'arriv':>6} {'rejet%':>7} {'sess':>5} {'tours':>6} {'tours/s':>8} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'err %':>6} {'occup':>6} {'health p99':>11}"
+    )
+    print(header, flush=True)
+    results = []
+    for concurrency in args.concurrency:
+        row = run_level(args, concurrency, examples, collects, rng)
+        results.append(row)
+        print(
+            f"{row['concurrency']:>5} {row['arrivals']:>6} {row['rejected_rate'] * 100:>7.1f} "
+            f"{row['sessions']:>5} {row['turns']:>6} {row['throughput_tps']:>8.2f} "
+            f"{row['p50_ms']:>8.0f} {row['p99_ms']:>8.0f} {row['error_rate'] * 100:>6.1f} "
+            f"{row['occupancy']:>6.2f} {row['health_p99_ms']:>9.0f}ms",
+            flush=True,
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import time
+import wave
+from pathlib import Path
+
+import pytest
+
+from actions.audio import PRIORITY_STEP, PRIORITY_URGENT, AudioSink, NullSink, PlaybackEngine, float_env
+
+
+def _wav(path: Path, seconds: float) -> str:
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(8000)
+        wav.writeframes(b"\x00\x00" * int(8000 * seconds))
+    return str(path)
+
+
+def _wait_idle(engine: PlaybackEngine, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = engine.stats()
+        if not stats["playing"] and stats["queue_depth"] == 0:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"moteur toujours occupé: {engine.stats()}")
+
+
+def test_enqueue_plays_in_priority_order(tmp_path: Path) -> None:
+    sink = NullSink(realtime=True)
+    engine = PlaybackEngine(sink)
+    first = _wav(tmp_path / "first.wav", 0.2)
+    step = _wav(tmp_path / "step.wav", 0.01)
+    urgent = _wav(tmp_path / "urgent.wav", 0.01)
+
+    engine.enqueue(first)
+    time.sleep(0.05)
+    engine.enqueue(step, priority=PRIORITY_STEP)
+    done = engine.enqueue(urgent, priority=PRIORITY_URGENT)
+
+    assert done.wait(2.0)
+    _wait_idle(engine)
+    assert sink.played == [first, urgent, step]
+    assert engine.stats()["played"] == 3
+
+
+def test_preempt_cuts_current_and_drops_queue(tmp_path: Path) -> None:
+    sink = NullSink(realtime=True)
+    engine = PlaybackEngine(sink)
+    long_one = _wav(tmp_path / "long.wav", 5.0)
+    stale = _wav(tmp_path / "stale.wav", 0.01)
+    fresh = _wav(tmp_path / "fresh.wav", 0.01)
+
+    long_done = engine.enqueue(long_one)
+    engine.enqueue(stale)
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    fresh_done = engine.enqueue(fresh, preempt=True)
+    assert long_done.wait(1.0)
+    assert time.monotonic() - started < 0.2
+    assert fresh_done.wait(1.0)
+
+    _wait_idle(engine)
+    assert sink.played == [long_one, fresh]
+    assert engine.stats()["dropped"] == 1
+
+
+def test_interrupt_stops_playback(tmp_path: Path) -> None:
+    sink = NullSink(realtime=True)
+    engine = PlaybackEngine(sink)
+    done = engine.enqueue(_wav(tmp_path / "long.wav", 5.0))
+    time.sleep(0.05)
+    assert engine.stats()["playing"]
+
+    engine.interrupt()
+    assert done.wait(0.5)
+    _wait_idle(engine)
+
+
+def test_chunks_are_merged_into_one_utterance(tmp_path: Path) -> None:
+    sink = NullSink()
+    engine = PlaybackEngine(sink)
+    chunks = [_wav(tmp_path / f"chunk{i}.wav", 0.05) for i in range(3)]
+
+    assert engine.enqueue(chunks).wait(2.0)
+    _wait_idle(engine)
+    assert len(sink.played) == 1
+    assert sink.played[0] not in chunks
+    assert not Path(sink.played[0]).exists()
+
+
+def test_empty_enqueue_is_done_immediately() -> None:
+    engine = PlaybackEngine(NullSink())
+    assert engine.enqueue([]).is_set()
+    assert engine.enqueue("").is_set()
+    assert engine.stats()["queue_depth"] == 0
+
+
+def test_float_env_falls_back_on_invalid_values(monkeypatch) -> None:
+    monkeypatch.setenv("TTS_TEST_FLOAT", "0,2")
+    assert float_env("TTS_TEST_FLOAT", 0.15) == 0.2
+    monkeypatch.setenv("TTS_TEST_FLOAT", "abc")
+    assert float_env("TTS_TEST_FLOAT", 0.15) == 0.15
+    monkeypatch.delenv("TTS_TEST_FLOAT")
+    assert float_env("TTS_TEST_FLOAT", 0.15) == 0.15
+
+
+def test_audio_sink_requires_play() -> None:
+    class Silent(AudioSink):
+        pass
+
+    with pytest.raises(TypeError):
+        Silent()  # type: ignore[abstract]
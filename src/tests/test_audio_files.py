@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pytest
+
+from rasa_sdk_plugins.audio_files import _parse_range, _resolve, serve_tts_file
+
+
+class _Stream:
+    def __init__(self) -> None:
+        self.body = b""
+        self.closed = False
+
+    async def send(self, data: Any) -> None:
+        self.body += bytes(data)
+
+    async def eof(self) -> None:
+        self.closed = True
+
+
+class _Request:
+    """Juste ce que `serve_tts_file` lit d'une requête Sanic."""
+
+    def __init__(self, method: str = "GET", **headers: str) -> None:
+        self.method = method
+        self.headers = {name.replace("_", "-"): value for name, value in headers.items()}
+        self.stream: Optional[_Stream] = None
+        self.status: Optional[int] = None
+        self.response_headers: Dict[str, str] = {}
+
+    async def respond(self, status: int, headers: Dict[str, str], content_type: str) -> _Stream:
+        self.status, self.response_headers = status, headers
+        self.stream = _Stream()
+        return self.stream
+
+
+@pytest.fixture
+def audio(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("TTS_OUTPUT_DIR", str(tmp_path))
+    path = tmp_path / "step.wav"
+    path.write_bytes(bytes(range(100)))
+    (tmp_path / ".env").write_text("OPENAI_API_KEY=secret", encoding="utf-8")
+    return path
+
+
+def _serve(request: _Request, name: str = "step.wav") -> Any:
+    return asyncio.run(serve_tts_file(request, name))
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("bytes=0-9", (0, 9)),
+        ("bytes=90-", (90, 99)),
+        ("bytes=-10", (90, 99)),
+        ("bytes=-500", (0, 99)),
+        ("bytes=95-200", (95, 99)),
+        (" bytes=5-5 ", (5, 5)),
+    ],
+)
+def test_parse_range(header: str, expected: Tuple[int, int]) -> None:
+    assert _parse_range(header, 100) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=50-10", "bytes=100-", "bytes=-0", "bytes=-", "items=0-1", "bytes=0-1,5-6"])
+def test_parse_range_rejects_unsatisfiable_or_malformed(header: str) -> None:
+    assert _parse_range(header, 100) is None
+
+
+def test_parse_range_on_empty_file() -> None:
+    assert _parse_range("bytes=0-", 0) is None
+    assert _parse_range("bytes=-1", 0) is None
+
+
+def test_resolve_rejects_traversal_and_dotfiles(audio: Path) -> None:
+    assert _resolve("step.wav") == audio.resolve()
+    for name in ("..", "../step.wav", ".env", "sub/step.wav", "..%2Fstep.wav", "missing.wav", ""):
+        assert _resolve(name) is None
+
+
+def test_full_get_streams_the_file(audio: Path) -> None:
+    request = _Request()
+
+    assert _serve(request) is None
+    assert request.status == 200
+    assert request.stream is not None and request.stream.body == audio.read_bytes()
+    assert request.stream.closed
+    assert request.response_headers["Content-Length"] == "100"
+
+
+def test_range_get_returns_206(audio: Path) -> None:
+    request = _Request(range="bytes=10-19")
+
+    _serve(request)
+
+    assert request.status == 206
+    assert request.response_headers["Content-Range"] == "bytes 10-19/100"
+    assert request.stream is not None and request.stream.body == bytes(range(10, 20))
+
+
+def test_unsatisfiable_range_returns_416(audio: Path) -> None:
+    resp = _serve(_Request(range="bytes=200-"))
+
+    assert resp.status == 416
+    assert resp.headers["Content-Range"] == "bytes */100"
+
+
+def test_matching_etag_returns_304_and_stale_if_range_ignores_range(audio: Path) -> None:
+    etag = _serve(_Request("HEAD")).headers["ETag"]
+
+    assert _serve(_Request(if_none_match=f'"other", {etag}')).status == 304
+
+    request = _Request(range="bytes=0-9", if_range='"stale"')
+    _serve(request)
+    assert request.status == 200
+    assert request.stream is not None and len(request.stream.body) == 100
+
+
+def test_dotfile_is_not_served(audio: Path) -> None:
+    assert _serve(_Request(), ".env").status == 404
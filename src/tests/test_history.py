@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+
+from ui.history import ChatHistory
+
+
+def _fill(history: ChatHistory, count: int) -> None:
+    for i in range(count):
+        history.append("user", f"message {i}")
+
+
+def test_pages_read_old_turns_from_log(tmp_path: Path) -> None:
+    history = ChatHistory("conv", window=3, log_dir=str(tmp_path))
+    _fill(history, 7)
+
+    assert [e["content"] for e in history.page(0, 3)] == ["message 4", "message 5", "message 6"]
+    assert [e["content"] for e in history.page(1, 3)] == ["message 1", "message 2", "message 3"]
+    assert [e["content"] for e in history.page(2, 3)] == ["message 0"]
+    assert history.page_count(3) == 3
+
+
+def test_history_is_keyed_by_conversation_id(tmp_path: Path) -> None:
+    first = ChatHistory("conv-a", window=3, log_dir=str(tmp_path))
+    _fill(first, 5)
+
+    other = ChatHistory("conv-b", window=3, log_dir=str(tmp_path))
+    assert len(other) == 0 and other.page(0) == []
+
+    again = ChatHistory("conv-a", window=3, log_dir=str(tmp_path))
+    assert len(again) == 5
+    assert [e["content"] for e in again.page(0, 5)] == [f"message {i}" for i in range(5)]
+    again.append("assistant", "suite")
+    assert [e["seq"] for e in again.page(0, 2)] == [4, 5]
+
+
+def test_shared_log_pages_only_show_own_turns(tmp_path: Path) -> None:
+    tab_a = ChatHistory("streamlit_user", window=1, log_dir=str(tmp_path))
+    tab_b = ChatHistory("streamlit_user", window=1, log_dir=str(tmp_path))
+    for i in range(3):
+        tab_a.append("user", f"A{i}")
+        tab_b.append("user", f"B{i}")
+
+    assert [e["content"] for e in tab_a.page(0, 3)] == ["A0", "A1", "A2"]
+    assert [e["content"] for e in tab_b.page(0, 3)] == ["B0", "B1", "B2"]
+
+
+def test_old_logs_are_pruned(tmp_path: Path) -> None:
+    now = time.time()
+    for i in range(5):
+        path = tmp_path / f"old-{i}.jsonl"
+        path.write_text('{"role":"user","content":"x"}\n', encoding="utf-8")
+        os.utime(path, (now - i * 60, now - i * 60))
+    stale = tmp_path / "stale.jsonl"
+    stale.write_text('{"role":"user","content":"x"}\n', encoding="utf-8")
+    os.utime(stale, (now - 30 * 86400, now - 30 * 86400))
+
+    ChatHistory("current", log_dir=str(tmp_path), max_files=3, max_age_days=7)
+
+    remaining = sorted(path.name for path in tmp_path.glob("*.jsonl"))
+    # Le journal courant (créé au premier tour) compte dans la limite.
+    assert remaining == ["old-0.jsonl", "old-1.jsonl"]
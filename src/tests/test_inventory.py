@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from rasa_sdk import Tracker
+
+from actions.inventory import (
+    CandidateSearch,
+    RecipeIndex,
+    describe_inventory,
+    inventory_labels,
+    merge_inventory,
+    normalize_ingredient,
+    parse_ingredients,
+)
+from actions.recipe_actions import ingredients_request
+from actions.recipe_store import RecipeStore, recipe_key, recipe_spec
+
+
+def _tracker(**slots: Any) -> Tracker:
+    return Tracker.from_dict({"sender_id": "test", "slots": slots, "latest_message": {}, "events": []})
+
+
+def test_invariant_plurals_are_not_truncated() -> None:
+    for word in ("noix", "maïs", "ananas", "radis", "petits pois", "couscous", "jus", "asparagus"):
+        assert normalize_ingredient(word) == word
+    assert normalize_ingredient("les tomates") == "tomate"
+    assert normalize_ingredient("des kiwis") == "kiwi"
+    assert normalize_ingredient("poireaux") == "poireau"
+
+
+def test_inventory_keeps_display_names_and_quantities() -> None:
+    inventory = merge_inventory({}, parse_ingredients("j'ai des noix, 3 tomates et 200 g de farine"))
+    inventory = merge_inventory(inventory, parse_ingredients("et 2 tomates"))
+
+    assert sorted(inventory) == ["farine", "noix", "tomate"]
+    assert inventory_labels(inventory) == ["farine", "noix", "tomates"]
+    assert describe_inventory(inventory) == ["farine (200 g)", "noix", "tomates (5)"]
+
+
+def test_old_inventory_format_is_still_read() -> None:
+    inventory = merge_inventory({"tomate": {"": 2.0}}, parse_ingredients("une tomate"))
+
+    assert inventory == {"tomate": {"label": "tomate", "amounts": {"": 3.0}}}
+
+
+def test_prompt_gets_display_names_spec_gets_keys() -> None:
+    inventory = merge_inventory({}, parse_ingredients("des noix, du maïs, un ananas et 3 tomates"))
+
+    prompt, spec = ingredients_request(_tracker(), inventory)
+
+    assert "Ingrédients disponibles: ananas (1), maïs, noix, tomates (3)\n" in prompt
+    assert spec["ingredients"] == ["ananas", "maïs", "noix", "tomate"]
+
+
+def _card(name: str, *ingredients: str) -> dict:
+    return {"recipe": {"name": name, "ingredients": [{"name": i, "critical": True} for i in ingredients]}}
+
+
+def test_index_sees_a_card_replaced_under_the_same_key() -> None:
+    store = RecipeStore(":memory:")
+    spec = recipe_spec(name="omelette")
+    store.put(recipe_key(spec), spec, _card("Omelette", "oeufs"))
+    index = RecipeIndex(store)
+    assert [c["name"] for c in index.candidates({"oeuf": {}})] == ["Omelette"]
+
+    store.put(recipe_key(spec), spec, _card("Omelette sans oeufs", "tofu"))
+
+    assert len(store) == 1
+    assert index.candidates({"oeuf": {}}) == []
+    assert [c["name"] for c in index.candidates({"tofu": {}})] == ["Omelette sans oeufs"]
+
+
+def test_pending_results_are_bounded_and_consumed() -> None:
+    search = CandidateSearch(RecipeIndex(RecipeStore(":memory:")), debounce_s=0.0, max_sessions=2)
+    inventory = merge_inventory({}, parse_ingredients("des oeufs"))
+    for sender_id in ("a", "b", "c"):
+        search._run(sender_id, inventory)
+
+    assert list(search._results) == ["b", "c"]
+    assert search.result("c", inventory) == []
+    assert list(search._results) == ["b"]
+
+
+def test_bad_env_values_fall_back_to_defaults(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("INVENTORY_DEBOUNCE_S", "vite")
+    monkeypatch.setenv("INVENTORY_CANDIDATES", "")
+
+    search = CandidateSearch(RecipeIndex(RecipeStore(":memory:")))
+
+    assert (search.debounce_s, search.limit) == (0.5, 3)
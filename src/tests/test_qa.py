@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+from rasa_sdk import Tracker
+from rasa_sdk.executor import CollectingDispatcher
+
+from actions import qa_actions
+from actions.qa_index import EXACT_TERM_CONFIDENCE, GlossaryQA, answer_from_recipe
+
+
+@pytest.fixture
+def qa(tmp_path: Path) -> GlossaryQA:
+    return GlossaryQA(learned_path=str(tmp_path / "learned.jsonl"))
+
+
+def _ask(monkeypatch: pytest.MonkeyPatch, qa: GlossaryQA, question: str, llm: Any) -> List[str]:
+    monkeypatch.setattr(qa_actions, "get_glossary_qa", lambda: qa)
+    monkeypatch.setattr(qa_actions, "call_openai_text", llm)
+    tracker = Tracker.from_dict(
+        {"sender_id": "t", "slots": {}, "latest_message": {"text": question}, "events": []}
+    )
+    dispatcher = CollectingDispatcher()
+    qa_actions.ActionAnswerQuestion().run(dispatcher, tracker, {})
+    return [message["text"] for message in dispatcher.messages]
+
+
+def _llm_down(question: str) -> str:
+    raise RuntimeError("OPENAI_API_KEY n'est pas défini.")
+
+
+def test_exact_term_in_longer_question_is_confident(qa: GlossaryQA) -> None:
+    hit = qa.lookup("c'est quoi blanchir des légumes")
+
+    assert hit["term"] == "blanchir"
+    assert hit["confidence"] >= EXACT_TERM_CONFIDENCE
+    assert hit["confidence"] >= qa.min_confidence
+
+
+def test_partial_match_stays_below_threshold(qa: GlossaryQA) -> None:
+    hit = qa.lookup("combien de temps pour cuire des pâtes")
+
+    assert hit is None or hit["confidence"] < qa.fallback_confidence
+
+
+def test_glossary_answer_skips_the_llm(monkeypatch: pytest.MonkeyPatch, qa: GlossaryQA) -> None:
+    def llm(question: str) -> str:
+        raise AssertionError("le LLM ne doit pas être appelé")
+
+    answers = _ask(monkeypatch, qa, "c'est quoi blanchir des légumes", llm)
+
+    assert answers and answers[0].lower().startswith("blanchir")
+
+
+def test_llm_failure_does_not_serve_a_weak_match(monkeypatch: pytest.MonkeyPatch, qa: GlossaryQA) -> None:
+    answers = _ask(monkeypatch, qa, "combien de temps pour cuire des pâtes", _llm_down)
+
+    assert answers == [
+        "Je n'ai pas de réponse à ça pour l'instant. Tu peux reformuler, ou dire 'répète' pour réentendre l'étape."
+    ]
+
+
+def test_llm_answer_is_learned(monkeypatch: pytest.MonkeyPatch, qa: GlossaryQA) -> None:
+    answers = _ask(monkeypatch, qa, "combien de temps pour cuire des pâtes", lambda q: "Environ 10 minutes.")
+
+    assert answers == ["Environ 10 minutes."]
+    assert qa.lookup("combien de temps pour cuire des pâtes")["answer"] == "Environ 10 minutes."
+    assert qa.learned_path.is_file()
+
+
+def test_duration_question_is_not_read_as_a_quantity() -> None:
+    recipe = {
+        "ingredients": [{"name": "pâtes", "quantity": 200, "unit": "g"}],
+        "times": {"total_min": 25},
+    }
+    steps = [{"index": 1, "instruction": "Cuire les pâtes.", "timer_min": 10}]
+
+    assert answer_from_recipe("combien de temps pour cuire les pâtes ?", recipe, steps) is None
+    assert answer_from_recipe("combien de pâtes faut-il ?", recipe, steps) == "Il faut 200 g de pâtes."
+    assert answer_from_recipe("combien de temps pour la recette en tout ?", recipe, steps) == (
+        "La recette prend environ 25 min au total."
+    )
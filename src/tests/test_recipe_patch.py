@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from actions.recipe_patch import apply_recipe_patch
+
+
+def _card(n_steps: int = 5) -> Dict[str, Any]:
+    return {
+        "recipe": {
+            "name": "Omelette",
+            "servings": 2,
+            "times": {"total_min": 20, "prep_min": 10, "cook_min": 10},
+            "ingredients": [{"name": "oeufs", "quantity": 4, "unit": None, "critical": True, "alternative": None}],
+            "steps": [
+                {"index": i, "instruction": f"Étape d'origine {i}", "timer_min": None}
+                for i in range(1, n_steps + 1)
+            ],
+        }
+    }
+
+
+def _patch(**changes: Any) -> Dict[str, Any]:
+    patch: Dict[str, Any] = {
+        "name": None,
+        "servings": None,
+        "times": None,
+        "ingredients_remove": [],
+        "ingredients_upsert": [],
+        "steps_remove": [],
+        "steps_replace": [],
+        "steps_insert": [],
+    }
+    patch.update(changes)
+    return patch
+
+
+def _instructions(card: Dict[str, Any]) -> List[str]:
+    return [step["instruction"] for step in card["recipe"]["steps"]]
+
+
+def test_insert_right_after_cursor_is_next_step() -> None:
+    card, cursor, changed, missed = apply_recipe_patch(
+        _card(), _patch(steps_insert=[{"after": 3, "instruction": "Nouvelle", "timer_min": None}]), step_cursor=3
+    )
+
+    assert _instructions(card)[cursor] == "Nouvelle"
+    assert cursor == 3
+    assert changed == [] and missed == []
+
+
+def test_insert_before_cursor_is_missed_not_done() -> None:
+    card, cursor, changed, missed = apply_recipe_patch(
+        _card(), _patch(steps_insert=[{"after": 1, "instruction": "Nouvelle", "timer_min": None}]), step_cursor=3
+    )
+
+    assert _instructions(card)[:4] == ["Étape d'origine 1", "Nouvelle", "Étape d'origine 2", "Étape d'origine 3"]
+    # Le curseur reste sur la dernière étape lue (ancienne étape 3, désormais 4).
+    assert cursor == 4
+    assert changed == []
+    assert missed == [2]
+
+
+def test_insert_at_start_before_any_step_is_next() -> None:
+    card, cursor, changed, missed = apply_recipe_patch(
+        _card(), _patch(steps_insert=[{"after": 0, "instruction": "Préchauffer", "timer_min": None}]), step_cursor=0
+    )
+
+    assert cursor == 0 and missed == []
+    assert _instructions(card)[0] == "Préchauffer"
+
+
+def test_insert_before_removed_cursor_step_becomes_next() -> None:
+    card, cursor, changed, missed = apply_recipe_patch(
+        _card(),
+        _patch(steps_remove=[3], steps_insert=[{"after": 2, "instruction": "Remplace 3", "timer_min": None}]),
+        step_cursor=3,
+    )
+
+    assert cursor == 2
+    assert _instructions(card)[cursor] == "Remplace 3"
+    assert missed == []
+
+
+def test_delete_around_cursor_renumbers() -> None:
+    card, cursor, changed, missed = apply_recipe_patch(_card(), _patch(steps_remove=[2, 4]), step_cursor=3)
+
+    assert [step["index"] for step in card["recipe"]["steps"]] == [1, 2, 3]
+    assert _instructions(card) == ["Étape d'origine 1", "Étape d'origine 3", "Étape d'origine 5"]
+    assert cursor == 2
+    assert _instructions(card)[cursor] == "Étape d'origine 5"
+    assert changed == [] and missed == []
+
+
+def test_edit_done_step_is_reported_edit_ahead_is_not() -> None:
+    replace = [
+        {"index": 2, "instruction": "Deux modifiée", "timer_min": 3},
+        {"index": 4, "instruction": "Quatre modifiée", "timer_min": None},
+    ]
+    card, cursor, changed, missed = apply_recipe_patch(_card(), _patch(steps_replace=replace), step_cursor=3)
+
+    assert cursor == 3
+    assert changed == [2]
+    assert missed == []
+    assert _instructions(card)[3] == "Quatre modifiée"
+
+
+def test_unknown_step_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        apply_recipe_patch(_card(), _patch(steps_remove=[9]), step_cursor=0)
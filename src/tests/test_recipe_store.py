@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+from rasa_sdk import Tracker
+
+from actions.inventory import merge_inventory, parse_ingredients
+from actions.pregenerate import load_specs
+from actions.recipe_actions import ingredients_request
+from actions.recipe_store import RecipeStore, recipe_key, recipe_spec, recipe_spec_from_dict
+
+
+def _tracker(**slots: Any) -> Tracker:
+    return Tracker.from_dict({"sender_id": "test", "slots": slots, "latest_message": {}, "events": []})
+
+
+def test_ingredient_lists_and_strings_give_the_same_spec() -> None:
+    expected = ["oeuf", "riz", "tomate"]
+
+    assert recipe_spec(ingredients="oeufs, tomates et riz")["ingredients"] == expected
+    assert recipe_spec(ingredients="Riz; des tomates; les œufs")["ingredients"] == expected
+    assert recipe_spec(ingredients=["oeufs", "tomates", "riz"])["ingredients"] == expected
+    assert recipe_spec(ingredients=["200 g de riz", "3 tomates", "oeuf"])["ingredients"] == expected
+
+
+def test_normalized_spec_is_stable() -> None:
+    spec = recipe_spec(ingredients=["oeufs", "tomatoes", "berries", "couscous"])
+
+    assert recipe_spec(ingredients=spec["ingredients"]) == spec
+
+
+def test_runtime_spec_matches_pregenerated_spec() -> None:
+    pregenerated: Dict[str, Any] = {"ingredients": ["oeufs", "tomates", "riz"], "servings": 2}
+    stored_key = recipe_key(recipe_spec(**pregenerated))
+
+    inventory = merge_inventory({}, parse_ingredients("j'ai des oeufs, 3 tomates et du riz"))
+    _, from_inventory = ingredients_request(_tracker(inventory=inventory, nb_personnes=2))
+    _, from_slot = ingredients_request(_tracker(liste_ingredients="oeufs, tomates et riz", nb_personnes=2.0))
+
+    assert recipe_key(from_inventory) == stored_key
+    assert recipe_key(from_slot) == stored_key
+
+
+def test_store_roundtrip() -> None:
+    store = RecipeStore(":memory:")
+    spec = recipe_spec(name=" Pâtes  Carbonara ", servings="2", ingredients="oeufs et lardons")
+    card = {"recipe": {"name": "Pâtes carbonara"}}
+
+    store.put(recipe_key(spec), spec, card)
+
+    assert store.get(recipe_key(recipe_spec(name="pâtes carbonara", servings=2.0, ingredients=["lardon", "oeuf"]))) == card
+    assert len(store) == 1
+
+
+def test_pregenerated_specs_file_is_read_with_runtime_keys(tmp_path: Path) -> None:
+    path = tmp_path / "specs.jsonl"
+    path.write_text(
+        json.dumps({"ingredients": ["oeufs", "tomates", "riz"], "servings": 2}) + "\n"
+        + json.dumps({"name": "Pâtes carbonara", "servings": 2, "time_max": 30}) + "\n",
+        encoding="utf-8",
+    )
+    fridge, by_name = [recipe_key(recipe_spec_from_dict(item)) for item in load_specs(str(path))]
+
+    inventory = merge_inventory({}, parse_ingredients("des oeufs, du riz et 2 tomates"))
+    _, runtime = ingredients_request(_tracker(inventory=inventory, nb_personnes=2))
+    assert recipe_key(runtime) == fridge
+    assert recipe_key(recipe_spec(name="pâtes carbonara", servings=2.0, time_max="30")) == by_name
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+from typing import List
+
+from rasa.shared.core.domain import Domain
+from rasa.shared.core.events import ActionExecuted, BotUttered, Event, SessionStarted, SlotSet, UserUttered
+from rasa.shared.core.trackers import DialogueStateTracker
+
+from addons.tracker_store import CompactSQLiteTrackerStore
+
+
+_DOMAIN_YAML = """
+version: "3.1"
+session_config:
+  session_expiration_time: 60
+  carry_over_slots_to_new_session: true
+intents:
+  - next_step
+slots:
+  step_index:
+    type: float
+    initial_value: 0
+    mappings:
+      - type: controlled
+  last_step_text:
+    type: text
+    mappings:
+      - type: controlled
+"""
+
+
+def _store(tmp_path: Path, **kwargs) -> CompactSQLiteTrackerStore:
+    return CompactSQLiteTrackerStore(
+        Domain.from_yaml(_DOMAIN_YAML), db=str(tmp_path / "trackers.db"), **kwargs
+    )
+
+
+def _session(start: float, turns: int) -> List[Event]:
+    events: List[Event] = [
+        ActionExecuted("action_session_start", timestamp=start),
+        SessionStarted(timestamp=start),
+        ActionExecuted("action_listen", timestamp=start),
+    ]
+    for turn in range(turns):
+        ts = start + turn + 1
+        events += [
+            UserUttered("next", intent={"name": "next_step", "confidence": 1.0}, timestamp=ts),
+            ActionExecuted("action_tell_recipe_step", timestamp=ts),
+            BotUttered(f"Étape {turn + 1}", timestamp=ts),
+            SlotSet("step_index", float(turn + 1), timestamp=ts),
+            SlotSet("last_step_text", f"Étape {turn + 1}", timestamp=ts),
+            ActionExecuted("action_listen", timestamp=ts),
+        ]
+    return events
+
+
+def _save_all(store: CompactSQLiteTrackerStore, sender_id: str, events: List[Event]) -> None:
+    tracker = DialogueStateTracker.from_events(sender_id, events, store.domain.slots)
+    asyncio.run(store.save(tracker))
+
+
+def _user_count(tracker: DialogueStateTracker) -> int:
+    return sum(isinstance(e, UserUttered) for e in tracker.events)
+
+
+def test_compact_keeps_boundary_state_and_last_turns(tmp_path: Path) -> None:
+    store = _store(tmp_path, keep_turns=3)
+    events = [e.as_dict() for e in _session(time.time(), 20)]
+
+    compacted = store.compact_events("s", events)
+
+    assert len(compacted) < len(events)
+    assert compacted[0]["name"] == "action_session_start"
+    assert compacted[1]["event"] == "session_started"
+    assert sum(e["event"] == "user" for e in compacted) == 3
+    tracker = DialogueStateTracker.from_dict("s", compacted, store.domain.slots)
+    assert tracker.get_slot("step_index") == 20.0
+    assert tracker.get_slot("last_step_text") == "Étape 20"
+
+
+def test_save_appends_deltas_and_compacts_past_threshold(tmp_path: Path) -> None:
+    store = _store(tmp_path, compact_after_events=50, keep_turns=2)
+    start = time.time()
+    sender_id = "cook"
+
+    _save_all(store, sender_id, _session(start, 1))
+    for turns in range(2, 15):
+        tracker = asyncio.run(store.retrieve(sender_id))
+        for event in _session(start, turns)[-6:]:
+            tracker.update(event)
+        asyncio.run(store.save(tracker))
+
+    tracker = asyncio.run(store.retrieve_full_tracker(sender_id))
+    assert len(tracker.events) <= 50
+    assert tracker.get_slot("step_index") == 14.0
+    assert _user_count(tracker) >= 2
+
+
+def test_idle_conversation_keeps_last_user_turn_so_rasa_expires_it(tmp_path: Path) -> None:
+    store = _store(tmp_path, keep_turns=10)
+    idle_since = time.time() - 2 * 3600
+    _save_all(store, "idle", _session(idle_since, 8))
+    store._conn.execute("UPDATE conversations SET updated_at = ?", (idle_since + 8,))
+
+    assert store.sweep_expired() == 1
+
+    tracker = asyncio.run(store.retrieve("idle"))
+    assert _user_count(tracker) == 1
+    assert tracker.is_session_time_expired(store.domain.session_config.session_expiration_time)
+    assert tracker.get_slot("step_index") == 8.0
+    stored = store._conn.execute("SELECT snapshot_events, delta_events FROM conversations").fetchone()
+    assert stored == (len(tracker.events), 0)
+
+
+def test_active_conversation_is_not_swept(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    _save_all(store, "active", _session(time.time(), 5))
+
+    assert store.sweep_expired() == 0
+    tracker = asyncio.run(store.retrieve("active"))
+    assert _user_count(tracker) == 5
+    assert not tracker.is_session_time_expired(store.domain.session_config.session_expiration_time)
+
+
+def test_loaded_cache_is_bounded(tmp_path: Path) -> None:
+    store = _store(tmp_path, loaded_cache_size=4)
+    for i in range(10):
+        _save_all(store, f"user{i}", _session(time.time(), 1))
+
+    assert list(store._loaded) == [f"user{i}" for i in range(6, 10)]
+    # Une conversation sortie du cache est réécrite, sans perte.
+    tracker = asyncio.run(store.retrieve("user0"))
+    tracker.update(UserUttered("next", timestamp=time.time()))
+    asyncio.run(store.save(tracker))
+    assert _user_count(asyncio.run(store.retrieve("user0"))) == 2
+
+
+def test_full_retrieval_between_retrieve_and_save_keeps_earlier_sessions(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    start = time.time() - 3 * 3600
+    _save_all(store, "cook", _session(start, 3) + _session(start + 2 * 3600, 2))
+    stored_before = len(asyncio.run(store.retrieve_full_tracker("cook")).events)
+
+    tracker = asyncio.run(store.retrieve("cook"))
+    assert _user_count(tracker) == 2
+    # GET /conversations/<id>/tracker (API HTTP, UI en mode rest) pendant le tour.
+    asyncio.run(store.retrieve_full_tracker("cook"))
+    tracker.update(UserUttered("next", intent={"name": "next_step", "confidence": 1.0}, timestamp=time.time()))
+    asyncio.run(store.save(tracker))
+
+    full = asyncio.run(store.retrieve_full_tracker("cook"))
+    assert len(full.events) == stored_before + 1
+    assert _user_count(full) == 6
+    assert sum(isinstance(e, SessionStarted) for e in full.events) == 2
+
+
+def test_unremembered_session_tracker_is_appended_not_rewritten(tmp_path: Path) -> None:
+    store = _store(tmp_path)
+    start = time.time() - 3 * 3600
+    _save_all(store, "cook", _session(start, 3) + _session(start + 2 * 3600, 2))
+
+    tracker = asyncio.run(store.retrieve("cook"))
+    store._loaded.clear()
+    tracker.update(UserUttered("next", timestamp=time.time()))
+    asyncio.run(store.save(tracker))
+
+    assert _user_count(asyncio.run(store.retrieve_full_tracker("cook"))) == 6
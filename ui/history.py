@@ -0,0 +1,185 @@
+"""Historique de conversation borné pour l'UI Streamlit.
+
+- fenêtre en mémoire limitée (UI_HISTORY_WINDOW, défaut: 50 tours)
+- chaque tour est aussi ajouté au journal JSONL compact de la conversation
+  (UI_HISTORY_DIR, défaut: ui_sessions; un fichier par Conversation ID, repris
+  s'il existe); les tours sortis de la fenêtre sont relus depuis ce journal par
+  position (offsets en mémoire), seulement quand on pagine vers le passé
+- rétention: seuls les UI_HISTORY_MAX_FILES (défaut: 20) journaux les plus
+  récents sont gardés, et aucun au-delà de UI_HISTORY_MAX_AGE_DAYS (défaut: 7)
+- les payloads `custom` sont résumés à la demande (une ligne, mémorisée), le JSON
+  complet n'est affiché que pour le tour ouvert explicitement
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+
+def summarize_custom(custom: Any) -> str:
+    """Résumé d'une ligne d'un payload custom/json_message."""
+
+    if isinstance(custom, dict):
+        recipe = custom.get("recipe")
+        if isinstance(recipe, dict):
+            total = (recipe.get("times") or {}).get("total_min")
+            parts = [
+                f"{len(recipe.get('ingredients') or [])} ingrédients",
+                f"{len(recipe.get('steps') or [])} étapes",
+            ]
+            if total:
+                parts.append(f"{total} min")
+            return f"Recette: {recipe.get('name') or '?'} ({', '.join(parts)})"
+        tts = custom.get("tts")
+        if isinstance(tts, dict):
+            return f"Audio: {str(tts.get('text') or '')[:80]}"
+        keys = list(custom)
+        more = f" (+{len(keys) - 5})" if len(keys) > 5 else ""
+        return f"Données: {', '.join(str(k) for k in keys[:5])}{more}"
+    if isinstance(custom, list):
+        return f"Données: liste de {len(custom)} éléments"
+    return f"Données: {str(custom)[:80]}"
+
+
+def prune_logs(directory: Path, keep: int, max_age_days: float, exclude: Optional[Path] = None) -> int:
+    """Supprime les journaux en trop (les plus anciens) ou trop vieux. Retourne leur nombre."""
+
+    logs = []
+    for path in directory.glob("*.jsonl"):
+        if exclude is not None and path == exclude:
+            continue
+        try:
+            logs.append((path.stat().st_mtime, path))
+        except OSError:
+            continue
+    logs.sort(reverse=True)
+
+    # Le journal courant compte dans la limite.
+    budget = max(0, keep - (1 if exclude is not None else 0))
+    cutoff = time.time() - max_age_days * 86400.0 if max_age_days > 0 else None
+    removed = 0
+    for rank, (mtime, path) in enumerate(logs):
+        if rank < budget and (cutoff is None or mtime >= cutoff):
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class ChatHistory:
+    """Tours d'une conversation: fenêtre bornée en mémoire + journal sur disque."""
+
+    def __init__(
+        self,
+        session_id: str,
+        window: Optional[int] = None,
+        log_dir: Optional[str] = None,
+        max_files: Optional[int] = None,
+        max_age_days: Optional[float] = None,
+    ) -> None:
+        self.session_id = session_id
+        self.window = window or int(os.getenv("UI_HISTORY_WINDOW", "50"))
+        directory = Path(log_dir or os.getenv("UI_HISTORY_DIR", "ui_sessions"))
+        directory.mkdir(parents=True, exist_ok=True)
+        safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in session_id) or "session"
+        self.log_path = directory / f"{safe_id}.jsonl"
+
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=self.window)
+        self._offsets: List[int] = []
+        self._lock = threading.Lock()
+        self._load_existing()
+
+        prune_logs(
+            directory,
+            keep=max_files if max_files is not None else int(os.getenv("UI_HISTORY_MAX_FILES", "20")),
+            max_age_days=(
+                max_age_days if max_age_days is not None else float(os.getenv("UI_HISTORY_MAX_AGE_DAYS", "7"))
+            ),
+            exclude=self.log_path,
+        )
+
+    def _load_existing(self) -> None:
+        """Reprend le journal de cette conversation: offsets de chaque tour + fenêtre récente."""
+
+        if not self.log_path.is_file():
+            return
+        with self.log_path.open("rb") as handle:
+            offset = 0
+            for line in handle:
+                if line.strip():
+                    self._offsets.append(offset)
+                offset += len(line)
+        first = max(0, len(self._offsets) - self.window)
+        if first < len(self._offsets):
+            self._recent.extend(self._read_from_log(first, len(self._offsets)))
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, role: str, content: str, customs: Optional[List[Any]] = None) -> Dict[str, Any]:
+        entry: Dict[str, Any] = {"role": role, "content": content}
+        if customs:
+            entry["customs"] = customs
+        line = (json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+        with self._lock:
+            entry["seq"] = len(self._offsets)
+            with self.log_path.open("ab") as handle:
+                self._offsets.append(handle.tell())
+                handle.write(line)
+            self._recent.append(entry)
+        return entry
+
+    def _read_from_log(self, start: int, stop: int) -> List[Dict[str, Any]]:
+        entries = []
+        with self.log_path.open("rb") as handle:
+            for seq in range(start, stop):
+                # Le journal peut être partagé (autre onglet, même Conversation ID): les
+                # lignes de cette instance ne sont pas forcément contiguës.
+                offset = self._offsets[seq]
+                if handle.tell() != offset:
+                    handle.seek(offset)
+                entry = json.loads(handle.readline())
+                entry["seq"] = seq
+                entries.append(entry)
+        return entries
+
+    def page(self, page: int = 0, page_size: int = 10) -> List[Dict[str, Any]]:
+        """Tours d'une page, du plus ancien au plus récent (page 0 = les plus récents)."""
+
+        with self._lock:
+            total = len(self._offsets)
+            stop = max(0, total - page * page_size)
+            start = max(0, stop - page_size)
+            if start >= stop:
+                return []
+
+            first_recent = total - len(self._recent)
+            if start >= first_recent:
+                recent = list(self._recent)
+                return recent[start - first_recent:stop - first_recent]
+
+            from_log = self._read_from_log(start, min(stop, first_recent))
+            if stop > first_recent:
+                from_log += list(self._recent)[: stop - first_recent]
+            return from_log
+
+    def page_count(self, page_size: int = 10) -> int:
+        return max(1, -(-len(self) // page_size))
+
+    @staticmethod
+    def summary(entry: Dict[str, Any]) -> List[str]:
+        """Résumés des payloads custom d'un tour (calculés au premier affichage)."""
+
+        if "summaries" not in entry:
+            entry["summaries"] = [summarize_custom(custom) for custom in entry.get("customs") or []]
+        return entry["summaries"]
@@ -2,13 +2,15 @@ from __future__ import annotations
 
 import hashlib
 import io
+import json
 import os
 import base64
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 import requests
 import streamlit as st
 
+from ui.history import ChatHistory
 from ui.ptt_component import push_to_talk_audio
 
 
@@ -32,6 +34,48 @@ def _post_rasa_message(rasa_url: str, sender_id: str, message: str, timeout_s: f
     return []
 
 
+@st.cache_resource
+def _http_session() -> requests.Session:
+    # Session partagée entre les reruns: la connexion HTTP reste ouverte (keep-alive).
+    return requests.Session()
+
+
+def _stream_rasa_message(
+    rasa_url: str, sender_id: str, message: str, timeout_s: float = 60.0
+) -> Iterator[Tuple[str, Any]]:
+    """Envoie un message au canal streaming (SSE) et produit les événements au fil de l'eau.
+
+    Événements: ("message", dict), ("slot", {"name", "value"}), ("audio", dict), ("error", dict).
+    """
+
+    url = f"{rasa_url.rstrip('/')}/webhooks/stream/webhook"
+    with _http_session().post(
+        url,
+        json={"sender": sender_id, "message": message},
+        headers={"Accept": "text/event-stream"},
+        stream=True,
+        timeout=timeout_s,
+    ) as resp:
+        resp.raise_for_status()
+
+        event = "message"
+        data_lines: List[str] = []
+        for line in resp.iter_lines(decode_unicode=True):
+            if line is None:
+                continue
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:"):].strip())
+            elif line == "" and data_lines:
+                data = json.loads("\n".join(data_lines))
+                data_lines = []
+                if event == "done":
+                    return
+                yield event, data
+                event = "message"
+
+
 def _get_rasa_tracker_slots(rasa_url: str, sender_id: str, timeout_s: float = 10.0) -> Dict[str, Any]:
     url = f"{rasa_url.rstrip('/')}/conversations/{sender_id}/tracker"
     resp = requests.get(url, timeout=timeout_s)
@@ -41,7 +85,14 @@ def _get_rasa_tracker_slots(rasa_url: str, sender_id: str, timeout_s: float = 10
     return slots if isinstance(slots, dict) else {}
 
 
-def _render_bot_message(msg: Dict[str, Any]) -> None:
+def _render_audio(audio: Dict[str, Any]) -> None:
+    # Audio servi par référence (route /tts du serveur d'actions): le navigateur le lit directement.
+    st.audio(audio["url"], format=str(audio.get("mime_type") or "audio/wav"))
+
+
+def _render_bot_message(msg: Dict[str, Any]) -> Optional[str]:
+    """Affiche un message bot; retourne l'URL de l'audio affiché, s'il y en a un."""
+
     text = msg.get("text")
     custom = msg.get("custom")  # json_message from Rasa becomes "custom" in REST channel
     image = msg.get("image")
@@ -52,9 +103,73 @@ def _render_bot_message(msg: Dict[str, Any]) -> None:
     if isinstance(image, str) and image.strip():
         st.image(image)
 
+    audio_url = None
+    tts = custom.get("tts") if isinstance(custom, dict) else None
+    if isinstance(tts, dict) and isinstance(tts.get("url"), str):
+        _render_audio(tts)
+        audio_url = tts["url"]
+        custom = {k: v for k, v in custom.items() if k != "tts"} or None
+
     if custom is not None:
         with st.expander("Données (custom/json_message)", expanded=False):
             st.json(custom)
+    return audio_url
+
+
+def _is_payload_dump(msg: Dict[str, Any]) -> bool:
+    # Les actions envoient le json_message aussi en texte (json.dumps): inutile de le garder deux fois.
+    text = msg.get("text")
+    return msg.get("custom") is not None and isinstance(text, str) and text.lstrip().startswith("{")
+
+
+def _history_customs(msg: Dict[str, Any]) -> List[Any]:
+    custom = msg.get("custom")
+    if isinstance(custom, dict):
+        custom = {k: v for k, v in custom.items() if k != "tts"} or None
+    return [custom] if custom is not None else []
+
+
+def _render_history(history: ChatHistory) -> None:
+    """Affiche une page de l'historique (seuls les tours visibles sont dessinés).
+
+    Optionnel: UI_HISTORY_PAGE_SIZE (défaut: 10), UI_HISTORY_MAX_CHARS (défaut: 1500)
+    """
+
+    page_size = int(_env("UI_HISTORY_PAGE_SIZE", "10"))
+    max_chars = int(_env("UI_HISTORY_MAX_CHARS", "1500"))
+    pages = history.page_count(page_size)
+    page = min(int(st.session_state.get("history_page", 0)), pages - 1)
+
+    if pages > 1:
+        older, label, newer = st.columns([1, 2, 1])
+        if older.button("◀ Plus anciens", disabled=page >= pages - 1, key="history_older"):
+            page += 1
+        if newer.button("Plus récents ▶", disabled=page == 0, key="history_newer"):
+            page -= 1
+        label.caption(f"Page {pages - page}/{pages} — {len(history)} messages")
+        st.session_state["history_page"] = page
+
+    opened = st.session_state.get("history_open")
+    for entry in history.page(page, page_size):
+        with st.chat_message(entry.get("role", "assistant")):
+            content = str(entry.get("content") or "")
+            if len(content) > max_chars:
+                content = content[:max_chars] + "…"
+            st.markdown(content)
+
+            summaries = ChatHistory.summary(entry)
+            if not summaries:
+                continue
+            for summary in summaries:
+                st.caption(summary)
+            if opened == entry["seq"]:
+                st.json(entry["customs"])
+                if st.button("Masquer", key=f"history_close_{entry['seq']}"):
+                    st.session_state["history_open"] = None
+                    st.rerun()
+            elif st.button("Détails", key=f"history_open_{entry['seq']}"):
+                st.session_state["history_open"] = entry["seq"]
+                st.rerun()
 
 
 def _transcribe_with_openai(audio_bytes: bytes, filename: str, mime_type: str) -> str:
@@ -94,8 +209,13 @@ def main() -> None:
     rasa_url = st.sidebar.text_input("Rasa URL", value=_env("RASA_URL", "http://localhost:5005"))
     sender_id = st.sidebar.text_input("Conversation ID", value=_env("RASA_SENDER_ID", "streamlit_user"))
 
-    if "messages" not in st.session_state:
-        st.session_state["messages"] = []
+    # Un historique par Conversation ID: changer d'ID recharge celui de la nouvelle conversation.
+    stored = st.session_state.get("history")
+    if stored is None or stored.session_id != sender_id:
+        st.session_state["history"] = ChatHistory(session_id=sender_id)
+        st.session_state["history_page"] = 0
+        st.session_state["history_open"] = None
+    history: ChatHistory = st.session_state["history"]
     if "last_slots" not in st.session_state:
         st.session_state["last_slots"] = {}
     if "last_audio_hash" not in st.session_state:
@@ -117,11 +237,7 @@ def main() -> None:
     if ptt is None:
         return
 
-    for m in st.session_state["messages"]:
-        role = m.get("role", "assistant")
-        content = m.get("content", "")
-        with st.chat_message(role):
-            st.markdown(content)
+    _render_history(history)
 
     audio_b64 = ptt.get("audio_base64")
     filename = str(ptt.get("filename") or "ptt.webm")
@@ -149,39 +265,73 @@ def main() -> None:
             return
 
         st.markdown(user_text)
-        st.session_state["messages"].append({"role": "user", "content": user_text})
+        history.append("user", user_text)
+        st.session_state["history_page"] = 0
 
     with st.chat_message("assistant"):
-        try:
-            responses = _post_rasa_message(rasa_url=rasa_url, sender_id=sender_id, message=user_text)
-        except requests.RequestException as exc:
-            st.error(f"Erreur d'appel Rasa: {exc}")
-            return
-
-        # If the bot returned no messages (e.g., action only sets slots), we still refresh slots.
-        if not responses:
-            st.caption("(aucun message bot) — slots mis à jour")
-
         rendered_text_parts: List[str] = []
-        for msg in responses:
-            # Render rich fields and also build a plain text summary for chat history.
-            _render_bot_message(msg)
-
-            if isinstance(msg.get("text"), str) and msg["text"].strip():
-                rendered_text_parts.append(msg["text"].strip())
-            elif msg.get("custom") is not None:
-                rendered_text_parts.append("[custom/json_message]")
-
-        # Update tracker slots (for ui_event / tts_last_file)
-        try:
-            slots = _get_rasa_tracker_slots(rasa_url=rasa_url, sender_id=sender_id)
+        customs: List[Any] = []
+        audio_urls: List[str] = []
+        slots = dict(st.session_state.get("last_slots") or {})
+
+        if _env("RASA_CHANNEL", "stream") == "stream":
+            # Les messages s'affichent dès qu'ils sont produits; les slots arrivent dans le même flux.
+            try:
+                for event, data in _stream_rasa_message(rasa_url=rasa_url, sender_id=sender_id, message=user_text):
+                    if event == "message" and isinstance(data, dict):
+                        audio_url = _render_bot_message(data)
+                        if audio_url:
+                            audio_urls.append(audio_url)
+                        customs.extend(_history_customs(data))
+                        if isinstance(data.get("text"), str) and data["text"].strip() and not _is_payload_dump(data):
+                            rendered_text_parts.append(data["text"].strip())
+                    elif event == "slot" and isinstance(data, dict) and data.get("name"):
+                        slots[data["name"]] = data.get("value")
+                    elif event == "audio" and isinstance(data, dict) and isinstance(data.get("url"), str):
+                        # Audio sans message (tts_last_file): déjà affiché s'il venait d'un message.
+                        if data["url"] not in audio_urls:
+                            _render_audio(data)
+                            audio_urls.append(data["url"])
+                    elif event == "error":
+                        st.error(f"Erreur Rasa: {data}")
+            except requests.RequestException as exc:
+                st.error(f"Erreur d'appel Rasa: {exc}")
+                return
             st.session_state["last_slots"] = slots
-        except requests.RequestException:
-            pass
 
-    # Store bot message as a compact text in history
-    bot_summary = "\n\n".join(rendered_text_parts) if rendered_text_parts else "(aucun message)"
-    st.session_state["messages"].append({"role": "assistant", "content": bot_summary})
+            if not rendered_text_parts:
+                st.caption("(aucun message bot) — slots mis à jour")
+        else:
+            try:
+                responses = _post_rasa_message(rasa_url=rasa_url, sender_id=sender_id, message=user_text)
+            except requests.RequestException as exc:
+                st.error(f"Erreur d'appel Rasa: {exc}")
+                return
+
+            # If the bot returned no messages (e.g., action only sets slots), we still refresh slots.
+            if not responses:
+                st.caption("(aucun message bot) — slots mis à jour")
+
+            for msg in responses:
+                # Render rich fields and also build a plain text summary for chat history.
+                _render_bot_message(msg)
+                customs.extend(_history_customs(msg))
+
+                if isinstance(msg.get("text"), str) and msg["text"].strip() and not _is_payload_dump(msg):
+                    rendered_text_parts.append(msg["text"].strip())
+
+            # Update tracker slots (for ui_event / tts_last_file)
+            try:
+                slots = _get_rasa_tracker_slots(rasa_url=rasa_url, sender_id=sender_id)
+                st.session_state["last_slots"] = slots
+            except requests.RequestException:
+                pass
+
+    # Store bot message as a compact text in history (payloads résumés à l'affichage)
+    bot_summary = "\n\n".join(rendered_text_parts) if rendered_text_parts else ""
+    if not bot_summary and not customs:
+        bot_summary = "(aucun message)"
+    history.append("assistant", bot_summary, customs)
 
 
 if __name__ == "__main__":